@@ -0,0 +1,398 @@
+class BackdropEntry:
+    """
+    A backdrop declaration line found in a theme CSS file.
+    """
+    __slots__ = ("url", "line", "start", "end", "byte_start", "byte_end",
+                 "commented", "section")
+
+    def __init__(self, url, line, start, end, byte_start, byte_end,
+                 commented, section):
+        """
+        Initialize the BackdropEntry.
+
+        Args:
+            url (string): The backdrop url.
+            line (int): The 0-based line number of the declaration.
+            start (int): The character offset of the start of the line.
+            end (int): The character offset of the end of the line,
+                       before the newline.
+            byte_start (int): The UTF-8 byte offset of the start of the line.
+            byte_end (int): The UTF-8 byte offset of the end of the line.
+            commented (boolean): Whether the declaration is commented out.
+            section (string): The theme section the line is in, "dark" or
+                              "light", or None outside of a section.
+        """
+        self.url = url
+        self.line = line
+        self.start = start
+        self.end = end
+        self.byte_start = byte_start
+        self.byte_end = byte_end
+        self.commented = commented
+        self.section = section
+
+
+class BackdropIndex:
+    """
+    An index of the backdrop declarations in a theme CSS file, built in a
+    single pass over the file's text. Keeps the text it was built from so
+    edits are applied to it and re-indexed without reading the file again.
+    """
+    # Markers of the light and dark theme sections of a file
+    SECTION_MARKERS = (("dark", ".theme-dark"), ("light", ".theme-light"))
+
+    def __init__(self, text, prop):
+        """
+        Initialize the BackdropIndex by parsing the text.
+
+        Args:
+            text (string): The CSS file content.
+            prop (string): The theme's backdrop property, like
+                           "--dplus-backdrop".
+        """
+        self.prop = prop
+        self.text = ""
+        self.entries = []
+        self.sections = {}  # Line of the last marker of each section
+        self.update(text)
+
+    @classmethod
+    def read(cls, file_path, prop):
+        """
+        Read and index a CSS file.
+
+        Args:
+            file_path (string): The path to the CSS file.
+            prop (string): The theme's backdrop property.
+
+        Returns:
+            (BackdropIndex): The index of the file.
+
+        Raises:
+            OSError: If the file can't be read.
+        """
+        with open(file_path, "r", encoding="utf-8") as file:
+            return cls(file.read(), prop)
+
+    def update(self, text):
+        """
+        Replace the indexed text and index it again.
+
+        Args:
+            text (string): The new CSS file content.
+        """
+        self.text = text
+        self.sections = {}
+        self.entries = self.parse(text, 0, len(text), 0, 0, None)
+
+    def parse(self, text, start, end, line, byte_offset, section):
+        """
+        Index the backdrop lines in a range of whole lines of the text.
+
+        Args:
+            text (string): The CSS file content.
+            start (int): The character offset of the first line.
+            end (int): The character offset of the end of the last line.
+            line (int): The line number of the first line.
+            byte_offset (int): The UTF-8 byte offset of the first line.
+            section (string): The theme section the first line is in.
+
+        Returns:
+            entries (list): The entries (BackdropEntry) in the range.
+        """
+        entries = []
+        offset = start
+        for number, line_text in enumerate(text[start:end].split("\n"),
+                                           start=line):
+            byte_length = len(line_text.encode("utf-8"))
+            for name, marker in self.SECTION_MARKERS:
+                if marker in line_text:
+                    section = name
+                    self.sections[name] = number
+                    break
+            if self.prop in line_text and "url(" in line_text:
+                url = self.parse_url(line_text)
+                if url:
+                    stripped = line_text.strip()
+                    entries.append(BackdropEntry(
+                        url, number, offset, offset + len(line_text),
+                        byte_offset, byte_offset + byte_length,
+                        stripped.startswith("/*") and stripped.endswith("*/"),
+                        section))
+            offset += len(line_text) + 1
+            byte_offset += byte_length + 1
+        return entries
+
+    def reindex(self, text):
+        """
+        Index a new version of the text, such as after an edit made
+        outside the program. Only the lines between the unchanged start
+        and end of the text are parsed again, the entries around them are
+        kept and shifted. Edits to the section markers index the whole
+        text again.
+
+        Args:
+            text (string): The new CSS file content.
+        """
+        old = self.text
+        if text == old:
+            return
+        # Find the unchanged start and end, then widen the changed part
+        # to whole lines
+        prefix = self.common_length(old, text)
+        suffix = self.common_length(old, text, prefix, from_end=True)
+        start = old.rfind("\n", 0, prefix) + 1
+        old_end = old.find("\n", len(old) - suffix)
+        if old_end == -1:
+            old_end = len(old)
+        new_end = old_end - len(old) + len(text)
+
+        old_part = old[start:old_end]
+        new_part = text[start:new_end]
+        if any(marker in part for _, marker in self.SECTION_MARKERS
+               for part in (old_part, new_part)):
+            self.update(text)
+            return
+
+        before = [entry for entry in self.entries if entry.end < start]
+        after = [entry for entry in self.entries if entry.start > old_end]
+        if before:
+            last = before[-1]
+            line = last.line + old.count("\n", last.end, start)
+            byte_offset = (last.byte_end +
+                           len(old[last.end:start].encode("utf-8")))
+        else:
+            line = old.count("\n", 0, start)
+            byte_offset = len(old[:start].encode("utf-8"))
+        changed = self.parse(text, start, new_end, line, byte_offset,
+                             self.section_at(start))
+        shift = len(new_part) - len(old_part)
+        byte_shift = (len(new_part.encode("utf-8")) -
+                      len(old_part.encode("utf-8")))
+        line_shift = new_part.count("\n") - old_part.count("\n")
+        for name, marker_line in self.sections.items():
+            if marker_line > line:
+                self.sections[name] = marker_line + line_shift
+        for entry in after:
+            entry.line += line_shift
+            entry.start += shift
+            entry.end += shift
+            entry.byte_start += byte_shift
+            entry.byte_end += byte_shift
+        self.text = text
+        self.entries = before + changed + after
+
+    def section_at(self, offset):
+        """
+        Get the theme section of the text at a character offset.
+
+        Args:
+            offset (int): The character offset in the indexed text.
+
+        Returns:
+            section (string): "dark" or "light", or None outside of a
+                              section.
+        """
+        section = None
+        last = -1
+        for name, marker in self.SECTION_MARKERS:
+            position = self.text.rfind(marker, 0, offset)
+            if position > last:
+                section, last = name, position
+        return section
+
+    @staticmethod
+    def common_length(first, second, skip=0, from_end=False):
+        """
+        Get the length of the common start or end of two strings.
+        Compares halves of the remaining range at a time, so long strings
+        are compared at C speed.
+
+        Args:
+            first (string): The first string.
+            second (string): The second string.
+            skip (int): The length at the start of both strings to leave
+                        out of the comparison.
+            from_end (boolean): Whether to compare the ends of the strings.
+
+        Returns:
+            low (int): The length of the common start or end.
+        """
+        low, high = 0, min(len(first), len(second)) - skip
+        while low < high:
+            middle = (low + high + 1) // 2
+            if from_end:
+                same = (first[len(first) - middle:len(first) - low] ==
+                        second[len(second) - middle:len(second) - low])
+            else:
+                same = first[low:middle] == second[low:middle]
+            if same:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    @staticmethod
+    def parse_url(line):
+        """
+        Get the url of a backdrop declaration line.
+
+        Args:
+            line (string): The CSS line with a url().
+
+        Returns:
+            url (string): The url without quotes, or "" if empty.
+        """
+        url_start = line.find("url(") + 4  # After "url(" for img url
+        url_end = line.find(")", url_start)  # Find the closing ")"
+        url = line[url_start:url_end].strip()
+
+        # Remove any quotes around the url
+        if len(url) > 1 and url[0] == url[-1] and url[0] in "'\"":
+            url = url[1:-1]
+        return url
+
+    def urls(self):
+        """
+        Get the url of every backdrop line in file order, including
+        repeated urls.
+
+        Returns:
+            (list): The backdrop urls.
+        """
+        return [entry.url for entry in self.entries]
+
+    def backdrop_urls(self):
+        """
+        Get the unique backdrop urls in file order.
+
+        Returns:
+            (list): The unique backdrop urls.
+        """
+        return list(dict.fromkeys(entry.url for entry in self.entries))
+
+    def find(self, url):
+        """
+        Get the backdrop lines of a url.
+
+        Args:
+            url (string): The backdrop url.
+
+        Returns:
+            (list): The entries (BackdropEntry) of the url in file order.
+        """
+        return [entry for entry in self.entries if entry.url == url]
+
+    def active_url(self):
+        """
+        Get the backdrop url that is set, the first one not commented out.
+
+        Returns:
+            (string): The active backdrop url, or None if there is none.
+        """
+        for entry in self.entries:
+            if not entry.commented:
+                return entry.url
+        return None
+
+    def last_entry(self, section=None):
+        """
+        Get the last backdrop line of the file or of a theme section.
+
+        Args:
+            section (string): "dark" or "light", or None for any section.
+
+        Returns:
+            (BackdropEntry): The last entry, or None if there is none.
+        """
+        for entry in reversed(self.entries):
+            if section is None or entry.section == section:
+                return entry
+        return None
+
+    def declaration(self, url):
+        """
+        Get a commented out backdrop declaration line for a url.
+
+        Args:
+            url (string): The backdrop url.
+
+        Returns:
+            (string): The declaration, without a newline.
+        """
+        return f"/*{self.prop}: url({url});*/"
+
+    def insert(self, positions, line):
+        """
+        Insert a line at each of the given line numbers, in order, and
+        index the new text. Positions outside the file are skipped.
+
+        Args:
+            positions (list): The line numbers for the inserted line.
+            line (string): The line to insert, without a newline.
+        """
+        lines = self.text.split("\n")
+        for position in positions:
+            if 0 <= position <= len(lines):
+                lines.insert(position, line)
+        self.update("\n".join(lines))
+
+    def replace_lines(self, new_lines):
+        """
+        Replace the text of backdrop lines, joining the unchanged text
+        between them by slices and shifting the offsets of the entries
+        after them instead of indexing the whole text again.
+
+        Args:
+            new_lines (dict): The new text of each changed entry
+                              (BackdropEntry), without a newline.
+        """
+        parts = []
+        position = 0
+        shift = 0
+        byte_shift = 0
+        for entry in self.entries:
+            line = new_lines.get(entry)
+            if line is None:
+                entry.start += shift
+                entry.end += shift
+                entry.byte_start += byte_shift
+                entry.byte_end += byte_shift
+                continue
+
+            parts.append(self.text[position:entry.start])
+            parts.append(line)
+            position = entry.end
+            length = len(line)
+            byte_length = len(line.encode("utf-8"))
+            old_length = entry.end - entry.start
+            old_byte_length = entry.byte_end - entry.byte_start
+            entry.start += shift
+            entry.end = entry.start + length
+            entry.byte_start += byte_shift
+            entry.byte_end = entry.byte_start + byte_length
+            stripped = line.strip()
+            entry.commented = (stripped.startswith("/*") and
+                               stripped.endswith("*/"))
+            shift += length - old_length
+            byte_shift += byte_length - old_byte_length
+        parts.append(self.text[position:])
+        self.text = "".join(parts)
+
+    def remove(self, url):
+        """
+        Remove every backdrop line of a url and index the new text.
+
+        Args:
+            url (string): The backdrop url to remove.
+
+        Returns:
+            (list): The line numbers the url was removed from.
+        """
+        removed = [entry.line for entry in self.find(url)]
+        if removed:
+            skip = set(removed)
+            lines = self.text.split("\n")
+            self.update("\n".join(line for number, line in enumerate(lines)
+                                  if number not in skip))
+        return removed
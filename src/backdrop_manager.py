@@ -1,36 +1,128 @@
+import os
 import re
+from backdrop_index import BackdropIndex
+from file_writer import FileWriter
 
 
 class BackdropManager:
     """
     Manages the modification of CSS files to update and check active backdrops.
+    Edits are made to the file's backdrop index and written from its text
+    in the background, so the file is only read once and the GUI never
+    waits on the disk.
+    In override mode the active backdrop is written to a small companion
+    CSS file instead, and the theme file is left alone.
     """
+    _patterns = {}  # Compiled backdrop line patterns by property
 
-    def __init__(self, css_file_path):
+    def __init__(self, css_file_path, prop=None, index=None):
         """
         Initialize the BackdropManager with the path to the CSS file.
 
         Args:
             css_file_path (string): The path to the CSS file.
+            prop (string): The theme's backdrop property.
+            index (BackdropIndex): The index of the file, or None to read
+                                   it on first use.
         """
         self.css_file_path = css_file_path
+        self.prop = prop
+        self.index = index
 
-    def update_css_file(self, active_backdrop, bg_str):
+    def get_index(self):
         """
-        Update the CSS file to select or deselect backdrops.
-        Finds backdrop lines and processes them based on
-        their commented state and properties.
+        Get the backdrop index of the CSS file, reading it on first use.
 
-         Args:
-             active_backdrop (string): The selected backdrop URL.
-             bg_str (string): The theme-specific CSS text used
-             to identify the backdrop line.
+        Returns:
+            (BackdropIndex): The index of the file.
+        """
+        if self.index is None:
+            self.index = BackdropIndex.read(self.css_file_path, self.prop)
+        return self.index
+
+    def save_index(self):
+        """
+        Queue the text of the edited backdrop index to be written to the
+        CSS file. Saves in quick succession are written once.
+        """
+        FileWriter.shared().write(self.css_file_path,
+                                  self.get_index().text)
+
+    def override_path(self):
+        """
+        Get the path of the companion override file of the CSS file,
+        like "DiscordPlus.backdrop.css" for "DiscordPlus.theme.css".
+
+        Returns:
+            (string): The path to the override file.
+        """
+        folder, name = os.path.split(self.css_file_path)
+        for suffix in (".theme.css", ".css"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        return os.path.join(folder, f"{name}.backdrop.css")
+
+    def uses_override(self):
+        """
+        Check if override mode is on, which it is while the override
+        file exists.
+
+        Returns:
+            (boolean): True if backdrops are set in the override file.
+        """
+        return bool(self.css_file_path and
+                    os.path.exists(self.override_path()))
+
+    def write_override(self, active_backdrop):
+        """
+        Queue the override file setting only the active backdrop.
+        Its size doesn't depend on the theme file, so neither does the
+        cost of writing it and of Discord reloading it.
+
+        Args:
+            active_backdrop (string): The selected backdrop URL.
         """
         if not active_backdrop:
             return
+        selectors = ", ".join([":root"] + [
+            marker for _, marker in BackdropIndex.SECTION_MARKERS])
+        theme_name = os.path.basename(self.css_file_path)
+        FileWriter.shared().write(self.override_path(), (
+            f"/* Active backdrop for {theme_name}, set by VCTheme */\n"
+            f"{selectors} {{\n"
+            f"  {self.prop}: url({active_backdrop}) !important;\n"
+            "}\n"))
+
+    def remove_override(self):
+        """
+        Turn override mode off by deleting the override file.
+        """
+        # Don't let a queued write create it again
+        FileWriter.shared().flush()
+        try:
+            os.remove(self.override_path())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Failed to remove override file: {e}")
+
+    @classmethod
+    def backdrop_pattern(cls, bg_str):
+        """
+        Get the compiled regex for a theme's backdrop lines, compiling it
+        on first use.
 
-        with open(self.css_file_path, "r") as file:
-            content = file.read()
+        Args:
+            bg_str (string): The theme-specific CSS text used
+            to identify the backdrop line.
+
+        Returns:
+            (re.Pattern): The backdrop line pattern.
+        """
+        pattern = cls._patterns.get(bg_str)
+        if pattern is not None:
+            return pattern
 
         # Unified regex pattern for the url lines
         pattern = re.compile(
@@ -56,32 +148,51 @@ class BackdropManager:
             r')'.format(re.escape(bg_str)),
             re.MULTILINE
         )
+        cls._patterns[bg_str] = pattern
+        return pattern
+
+    def update_css_file(self, active_backdrop, bg_str):
+        """
+        Update the CSS file to select or deselect backdrops.
+        Only the backdrop lines whose commented state has to change are
+        matched and rewritten, using their offsets from the file's index.
+
+         Args:
+             active_backdrop (string): The selected backdrop URL.
+             bg_str (string): The theme-specific CSS text used
+             to identify the backdrop line.
+        """
+        if not active_backdrop:
+            return
 
-        # Process regex pattern for each matched backdrop line
-        new_lines = []
-        for match in pattern.finditer(content):  # find each backdrop link
+        index = self.get_index()
+        content = index.text
+        pattern = self.backdrop_pattern(bg_str)
+
+        # Process regex pattern for each backdrop line to change
+        new_lines = {}
+        for entry in index.entries:
+            if entry.commented != (entry.url == active_backdrop):
+                continue  # Already commented or uncommented as it should be
+            match = pattern.search(content, entry.start, entry.end)
+            if match is None:
+                continue
             groups = match.groupdict()  # extract each group from pattern
-            url = groups['url'].strip('\'"')
 
-            if url == active_backdrop:  # uncomment url (indent/prop/trailing)
+            if entry.url == active_backdrop:  # uncomment (indent/prop/trail)
                 new_line = (f"{groups['indent']}{groups['prop']}"
                             f"{groups['trailing']}")
             else:
                 new_line = (f"{groups['indent']}/*{groups['prop']}*/"
                             f"{groups['trailing']}")
 
-            new_lines.append((match.start(), match.end(), new_line))
+            new_lines[entry] = (content[entry.start:match.start()] +
+                                new_line + content[match.end():entry.end])
 
-        # Rebuild content only if there are matches found
+        # Rewrite the changed lines only if there are any
         if new_lines:
-            content_list = list(content)
-            for start, end, replace in reversed(new_lines):
-                content_list[start:end] = replace
-
-            new_content = "".join(content_list)
-            if new_content != content:
-                with open(self.css_file_path, "w") as file:
-                    file.write(new_content)
+            index.replace_lines(new_lines)
+            self.save_index()
 
     def is_backdrop_commented(self, line):
         """
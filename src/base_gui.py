@@ -1,10 +1,20 @@
 import os
 import re
+import time
+import queue
+import threading
 import tkinter as tk
 import random
 from tkinter import filedialog, messagebox
 from image_preview import ImagePreview
 from PIL import Image, ImageTk
+from backdrop_manager import BackdropManager
+from backdrop_index import BackdropIndex
+from file_writer import FileWriter
+from image_stats import ImageStatsIndex
+from near_duplicates import NearDuplicateFinder, NearDuplicateWindow
+from session_snapshot import SessionSnapshot
+from thumbnail_cache import MemoryThumbnailCache
 from setup import Setup
 from updater import Updater
 
@@ -14,6 +24,8 @@ class BaseGUI:
     Base class for managing the GUI, for extension by theme-specific classes.
     Includes file operations, backdrop management, and UI setup
     """
+    WATCH_INTERVAL = 1000  # ms between checks of the open file for edits
+
     def __init__(self, root, theme_config, file_manager, backdrop_manager):
         """
         Initialize the BaseGUI with the root window, theme configuration,
@@ -48,6 +60,17 @@ class BaseGUI:
         self.cycle_menu = None
         self.cycle_status_var = tk.StringVar()
         self.cycle_status_label = None
+        self.preview_status_var = tk.StringVar()
+        self.watch_id = None
+        self.file_stat = None  # Last seen [mtime_ns, size] of the open file
+        self.preview_status_label = None
+
+        # Preview grid sorting and filtering by image statistics
+        self.view_sort_var = tk.StringVar(value="file")
+        self.view_filter_var = tk.StringVar(value="all")
+        self.zoom_var = tk.IntVar(value=ImagePreview.DEFAULT_ZOOM)
+        # Whether backdrops are set in an override file, not the theme file
+        self.override_var = tk.BooleanVar(value=False)
 
         # Get current version and set up the updater
         self.current_version = self.file_manager.get_version()
@@ -74,6 +97,13 @@ class BaseGUI:
         # Bind Enter shortcut for adding backdrop
         self.root.bind("<Return>",
                        lambda event: self.add_backdrop_to_css())
+        # Bind Ctrl+=/Ctrl+- shortcuts for zooming the previews
+        for key in ("<Control-equal>", "<Control-plus>"):
+            self.root.bind(key, lambda event: self.zoom_previews(1))
+        self.root.bind("<Control-minus>",
+                       lambda event: self.zoom_previews(-1))
+        # Save the session snapshot when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_menu(self):
         """
@@ -103,7 +133,7 @@ class BaseGUI:
                              command=self.return_to_selector)
         filemenu.add_separator()
         filemenu.add_command(label="Exit",
-                             command=self.root.quit)
+                             command=self.on_close)
         menubar.add_cascade(label="File", menu=filemenu)
 
         # Edit menu
@@ -113,8 +143,45 @@ class BaseGUI:
         editmenu.add_separator()
         editmenu.add_command(label="Delete Selected (Del)",
                              command=self.delete_backdrop)
+        editmenu.add_separator()
+        editmenu.add_command(label="Recheck Broken Previews",
+                             command=self.recheck_previews)
+        editmenu.add_separator()
+        editmenu.add_command(label="Find Near-Duplicates",
+                             command=self.find_near_duplicates)
+        editmenu.add_separator()
+        editmenu.add_checkbutton(label="Set Backdrop in Override File",
+                                 variable=self.override_var,
+                                 command=self.toggle_override_file)
         menubar.add_cascade(label="Edit", menu=editmenu)
 
+        # View menu, sorts and filters the previews by image statistics
+        viewmenu = tk.Menu(menubar, tearoff=0)
+        for label, value in (("File Order", "file"),
+                             ("Darkest First", "dark"),
+                             ("Brightest First", "light"),
+                             ("Largest First", "size"),
+                             ("By Colour", "color")):
+            viewmenu.add_radiobutton(label=label, value=value,
+                                     variable=self.view_sort_var,
+                                     command=self.apply_preview_view)
+        viewmenu.add_separator()
+        for label, value in (("All Backdrops", "all"),
+                             ("Dark Backdrops", "dark"),
+                             ("Light Backdrops", "light"),
+                             ("1920x1080 and Larger", "hd")):
+            viewmenu.add_radiobutton(label=label, value=value,
+                                     variable=self.view_filter_var,
+                                     command=self.apply_preview_view)
+        viewmenu.add_separator()
+        for label, value in (("Small Previews (Ctrl+-)", 0),
+                             ("Medium Previews", 1),
+                             ("Large Previews (Ctrl+=)", 2)):
+            viewmenu.add_radiobutton(label=label, value=value,
+                                     variable=self.zoom_var,
+                                     command=self.apply_preview_zoom)
+        menubar.add_cascade(label="View", menu=viewmenu)
+
         # Image cycle menu
         cyclemenu = tk.Menu(menubar, tearoff=0)
         self.cycle_menu = cyclemenu  # Store reference
@@ -194,6 +261,49 @@ class BaseGUI:
             else:  # file was already valid
                 break
 
+        return self.load_file(file_path)
+
+    def load_file(self, file_path):
+        """
+        Read a CSS file and update the GUI with its backdrops.
+
+        Args:
+            file_path (string): The path to the CSS file.
+
+        Returns:
+            (string): The path to the loaded file.
+        """
+        # Read the CSS file and index its backdrops, after any edits
+        # still waiting to be written
+        FileWriter.shared().flush()
+        index = self.file_manager.read_index(file_path)
+        if index is None:
+            self.show_file(file_path, [], [])
+        else:
+            self.show_file(file_path, index.urls(), index.backdrop_urls(),
+                           index, index.active_url())
+        return file_path
+
+    def show_file(self, file_path, img_urls, backdrop_urls, index=None,
+                  active_url=None):
+        """
+        Show the backdrops of a CSS file in the dropdown and preview grid.
+
+        Args:
+            file_path (string): The path to the CSS file.
+            img_urls (list): The image urls for the preview grid.
+            backdrop_urls (list): The backdrop urls for the dropdown, or a
+                                  (dark, light) tuple of lists.
+            index (BackdropIndex): The index of the file, or None to read
+                                   it when first needed.
+            active_url (string): The url of the file's active backdrop, to
+                                 highlight and fetch first.
+        """
+        self.css_file_path = file_path
+        self.backdrop_manager = BackdropManager(file_path,
+                                                self.theme_config[2], index)
+        self.override_var.set(self.backdrop_manager.uses_override())
+        self.watch_file()
         self.backdrop_options = tk.StringVar(value="Select Backdrop")
 
         # Clear the existing image grid
@@ -206,41 +316,189 @@ class BaseGUI:
         self.backdrop_menu['menu'].entryconfig(0, state="disabled")
         self.backdrop_menu['menu'].add_separator()
 
-        # Read the CSS file and extract image URLs
-        with open(file_path, "r"):
-            css_content, img_urls = self.file_manager.extract_urls(file_path)
-            backdrop_urls = []
-            if css_content and img_urls:
+        # Not the backdrop picked in the previously opened file
+        self.active_backdrop = active_url
+        if not img_urls:
+            return
+        self.backdrop_urls = backdrop_urls
 
-                # Extract backdrops and populate the dropdown
-                self.backdrop_urls = self.extract_backdrops(css_content)
+        # Update label when a file is loaded
+        self.header_label.config(
+            text="Select a backdrop by clicking on an image"
+                 " or using 'Select Backdrop'",
+            font=("Arial", 12, "bold")
+        )
+        self.sub_label.config(
+            text=f"Loaded {len(self.backdrop_urls)} backdrops from: "
+            f"{os.path.basename(file_path)}",
+            font=("Arial", 9)
+        )
+        self.sub_label.pack()
 
-                # Update label when a file is loaded
-                self.header_label.config(
-                    text="Select a backdrop by clicking on an image"
-                         " or using 'Select Backdrop'",
-                    font=("Arial", 12, "bold")
-                )
-                self.sub_label.config(
-                    text=f"Loaded {len(self.backdrop_urls)} backdrops from: "
-                    f"{os.path.basename(file_path)}",
-                    font=("Arial", 9)
-                )
-                self.sub_label.pack()
+        # Create and store the ImagePreview instance
+        self.img_preview_instance = ImagePreview(
+            self.img_grid_frame, img_urls,
+            onclick=self.set_active_backdrop,
+            onstatus=self.preview_status_var.set,
+            zoom=self.zoom_var.get(),
+            active_url=active_url)
+
+        # Check for tuple backdrops in case of light + dark themes
+        if isinstance(backdrop_urls, tuple):
+            backdrop_urls = backdrop_urls[0] + backdrop_urls[1]
+        self.populate_dropdown(list(dict.fromkeys(backdrop_urls)))
+        if (self.view_sort_var.get() != "file" or
+                self.view_filter_var.get() != "all"):
+            self.apply_preview_view()
+
+    def watch_file(self):
+        """
+        Start checking the open file for edits made outside the program.
+        """
+        self.file_stat = SessionSnapshot.stat(self.css_file_path)
+        if self.watch_id is None:
+            self.watch_id = self.root.after(self.WATCH_INTERVAL,
+                                            self.check_file)
+
+    def check_file(self):
+        """
+        Apply edits made to the open file outside the program, like in
+        Vencord's QuickCSS editor or a text editor. The file is only read
+        when its modification time or size changed, only the changed
+        lines are indexed again, and the dropdown and preview grid are
+        only updated if the backdrops changed.
+        """
+        self.watch_id = self.root.after(self.WATCH_INTERVAL, self.check_file)
+        stat = SessionSnapshot.stat(self.css_file_path)
+        if stat is None or stat == self.file_stat:
+            return
+        if FileWriter.shared().is_pending(self.css_file_path):
+            return  # The program's own edit is still being written
+        try:
+            with open(self.css_file_path, "r", encoding="utf-8") as file:
+                text = file.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Failed to read edited CSS file: {e}")
+            return
+        self.file_stat = stat
+
+        index = self.backdrop_manager.index
+        if index is None:
+            # Warm started from a snapshot, so there is no earlier text to
+            # compare, only the backdrops that are shown
+            index = BackdropIndex(text, self.backdrop_manager.prop)
+            self.backdrop_manager.index = index
+            old_urls = (self.img_preview_instance.img_urls
+                        if self.img_preview_instance else [])
+        else:
+            if text == index.text:
+                return  # Written by the program itself
+            old_urls = index.urls()
+            index.reindex(text)
+        print(f"Indexed outside edits to {self.css_file_path}")
+
+        # Follow a backdrop set outside the program
+        active = index.active_url()
+        if (active and active != self.active_backdrop and
+                not self.override_var.get()):
+            self.active_backdrop = active
+            if self.img_preview_instance:
+                self.img_preview_instance.highlight_image(active)
+        if index.urls() == old_urls:
+            return
+
+        uniq_list = index.backdrop_urls()
+        self.backdrop_urls = uniq_list
+        if hasattr(self, 'current_cycle_order'):
+            present = set(uniq_list)
+            added = [url for url in uniq_list
+                     if url not in self.current_cycle_order]
+            self.current_cycle_order = [
+                url for url in self.current_cycle_order
+                if url in present] + added
+            self.unused_backdrops = [url for url in self.unused_backdrops
+                                     if url in present] + added
+        if self.img_preview_instance is None:
+            # The file had no backdrops when it was opened
+            self.show_file(self.css_file_path, index.urls(), uniq_list,
+                           index, index.active_url())
+            return
+        self.populate_dropdown(uniq_list)
+        self.img_preview_instance.update_urls(index.urls())
+        self.sub_label.config(
+            text=f"Updated backdrops from outside edits to: "
+            f"{os.path.basename(self.css_file_path)}",
+            font=("Arial", 9)
+        )
+        self.sub_label.pack()
+
+    def save_snapshot(self):
+        """
+        Save the open file's backdrops and loaded thumbnails so the next
+        launch can show them before reading the file.
+        """
+        preview = self.img_preview_instance
+        if not self.css_file_path or preview is None:
+            return
+        # The snapshot records the file as written
+        FileWriter.shared().flush()
+        thumbnails = {}
+        digests = {}
+        for url in dict.fromkeys(preview.img_urls):
+            img = preview.memory_cache.get(url, preview.preview_size)
+            if img is not None:
+                thumbnails[url] = img
+                digests[url] = preview.memory_cache.digest(
+                    url, preview.preview_size)
+        # All of the file's urls in file order, not the filtered and sorted
+        # view, which is applied again when the grid is shown
+        snapshot = SessionSnapshot(self.css_file_path, preview.img_urls,
+                                   self.backdrop_urls, self.active_backdrop,
+                                   preview_size=preview.preview_size,
+                                   thumbnails=thumbnails, digests=digests)
+        snapshot.save(SessionSnapshot.path(self.theme_config[1]))
+
+    def restore_snapshot(self):
+        """
+        Show the file from the last session's snapshot. The thumbnails are
+        shown straight from the snapshot, and the file is only read again
+        if it changed since.
+        """
+        start = time.perf_counter()
+        snapshot = SessionSnapshot.load(
+            SessionSnapshot.path(self.theme_config[1]))
+        if snapshot is None or not os.path.exists(snapshot.file_path):
+            return
 
-                # Create and store the ImagePreview instance
-                self.img_preview_instance = ImagePreview(
-                    self.img_grid_frame, img_urls,
-                    onclick=self.set_active_backdrop)
+        # Reopen the grid at the zoom level the thumbnails were saved at
+        if snapshot.preview_size in ImagePreview.PREVIEW_LEVELS:
+            self.zoom_var.set(
+                ImagePreview.PREVIEW_LEVELS.index(snapshot.preview_size))
+        memory_cache = MemoryThumbnailCache.shared()
+        for url, img in snapshot.thumbnails.items():
+            memory_cache.put(url, snapshot.preview_size, img,
+                             snapshot.digests.get(url))
+
+        if snapshot.is_current():
+            backdrop_urls = snapshot.backdrop_urls
+            if backdrop_urls and isinstance(backdrop_urls[0], list):
+                backdrop_urls = tuple(backdrop_urls)  # Light + dark themes
+            self.show_file(snapshot.file_path, snapshot.img_urls,
+                           backdrop_urls, active_url=snapshot.active_url)
+        else:
+            self.load_file(snapshot.file_path)
 
-                # Check for tuple backdrops in case of light + dark themes
-                if isinstance(self.backdrop_urls, tuple):
-                    backdrop_urls = (self.backdrop_urls[0] +
-                                     self.backdrop_urls[1])
-                    uniq_list = list(dict.fromkeys(backdrop_urls))
-                    self.populate_dropdown(uniq_list)
+        self.root.update_idletasks()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Restored {len(snapshot.thumbnails)} previews from the last "
+              f"session in {elapsed:.0f} ms")
 
-        return file_path
+    def on_close(self):
+        """
+        Save the session snapshot and close the program.
+        """
+        self.save_snapshot()
+        self.root.destroy()
 
     def extract_backdrops(self, css_text):
         """
@@ -253,27 +511,7 @@ class BaseGUI:
         Returns:
             list: A list of backdrop urls in descending order from CSS file.
         """
-        backdrop_urls = []
-        lines = css_text.split("\n")
-        for line in lines:
-            # Check if the line contains the backdrop property and a URL
-            if self.theme_config[2] in line and "url(" in line:
-                # Extract the URL from the line
-                url_start = line.find("url(") + 4  # After "url(" for img url
-                url_end = line.find(")", url_start)  # Find the closing ")"
-                backdrop_url = line[url_start:url_end].strip()
-
-                # Remove any quotes around the URL
-                if backdrop_url.startswith('"') and backdrop_url.endswith('"'):
-                    backdrop_url = backdrop_url[1:-1]
-                elif (backdrop_url.startswith("'") and
-                      backdrop_url.endswith("'")):
-                    backdrop_url = backdrop_url[1:-1]
-
-                # Add the URL to the list if unique
-                if backdrop_url and backdrop_url not in backdrop_urls:
-                    backdrop_urls.append(backdrop_url)
-        return backdrop_urls
+        return BackdropIndex(css_text, self.theme_config[2]).backdrop_urls()
 
     def populate_dropdown(self, backdrop_urls):
         """
@@ -301,13 +539,42 @@ class BaseGUI:
             selected_url (string): The url of the selected backdrop.
         """
         self.active_backdrop = selected_url
-        self.backdrop_manager.update_css_file(self.active_backdrop,
-                                              self.theme_config[2])
+        if self.override_var.get():
+            self.backdrop_manager.write_override(self.active_backdrop)
+        else:
+            self.backdrop_manager.update_css_file(self.active_backdrop,
+                                                  self.theme_config[2])
 
         # Highlight the selected image in the preview
         if self.img_preview_instance:
             self.img_preview_instance.highlight_image(selected_url)
 
+    def toggle_override_file(self):
+        """
+        Switch between setting the active backdrop in a companion override
+        file and commenting/uncommenting it in the theme file.
+        """
+        if not self.css_file_path:
+            messagebox.showerror("Error", "Please load a CSS file first.")
+            self.override_var.set(False)
+            return
+
+        active = self.active_backdrop
+        if active == "Select Backdrop":
+            active = None
+        if self.override_var.get():
+            self.backdrop_manager.write_override(active)
+            messagebox.showinfo(
+                "Override File",
+                "Backdrops will be set in "
+                f"{os.path.basename(self.backdrop_manager.override_path())}."
+                "\nEnable it in Vencord's Themes settings.")
+        else:
+            self.backdrop_manager.remove_override()
+            if active:
+                self.backdrop_manager.update_css_file(active,
+                                                      self.theme_config[2])
+
     def add_backdrop_to_css(self):
         """
         Add a new backdrop URL to the CSS file.
@@ -334,29 +601,19 @@ class BaseGUI:
                 ".jpg/jpeg, or .gif extension.")
             return
 
-        # Read the CSS file
-        with open(self.css_file_path, "r") as file:
-            css_content = file.readlines()
-
         # Check for duplicate links
-        if any(f"url({link})" in line for line in css_content):
+        index = self.backdrop_manager.get_index()
+        if index.find(link):
             messagebox.showerror(
                 "Error",
                 "This link is already present in the list of backdrops.")
             return
 
-        # Find the index where the new backdrop should be added
-        backdrop_index = -1
-        for i, line in enumerate(css_content):
-            if self.theme_config[2] in line and "url(" in line:
-                backdrop_index = i
-
-        # Write the updated CSS file
-        with open(self.css_file_path, "w") as file:
-            for i, line in enumerate(css_content):
-                file.write(line)
-                if i == backdrop_index:
-                    file.write(f"/*{self.theme_config[2]}: url({link});*/\n")
+        # Add the new backdrop after the last one and write the CSS file
+        last = index.last_entry()
+        if last is not None:
+            index.insert([last.line + 1], index.declaration(link))
+            self.backdrop_manager.save_index()
 
         # Update sub label with the new link added
         self.sub_label.config(
@@ -390,10 +647,8 @@ class BaseGUI:
 
         if selected_url and selected_url != "Select Backdrop":
 
-            with open(self.css_file_path, "r") as file:
-                css_content = file.read()
-                backdrop_urls = self.extract_backdrops(css_content)
-            if len(backdrop_urls) == 1:
+            index = self.backdrop_manager.get_index()
+            if len(index.backdrop_urls()) == 1:
                 confirm = messagebox.showinfo(
                  "Can't Delete Backdrop",
                  "You can't delete the last backdrop in the CSS file."
@@ -404,23 +659,11 @@ class BaseGUI:
                 f"Are you sure you want to delete '{selected_url}'?"
             )
             if confirm:
-                # Read the CSS file
-                with open(self.css_file_path, "r") as file:
-                    lines = file.readlines()
-
-                # Track positions of the selected URL for both light and dark
+                # Remove the line(s) of the selected URL, tracking their
+                # positions for both light and dark
                 self.last_deleted_url = selected_url
-                self.last_deleted_pos_list = []
-
-                for i, line in enumerate(lines):
-                    if f"url({selected_url})" in line:
-                        self.last_deleted_pos_list.append(i)
-
-                # Rewrite the CSS file without the line(s) of the selected URL
-                with open(self.css_file_path, "w") as file:
-                    for line in lines:
-                        if f"url({selected_url})" not in line:
-                            file.write(line)
+                self.last_deleted_pos_list = index.remove(selected_url)
+                self.backdrop_manager.save_index()
 
                 # Remove the backdrop from the dropdown menu
                 self.backdrop_menu['menu'].delete(0, 'end')
@@ -428,15 +671,10 @@ class BaseGUI:
                                                        state="disabled")
                 self.backdrop_menu['menu'].add_separator()
 
-                # Re-extract and populate the dropdown with updated backdrops
-                with open(self.css_file_path, "r") as file:
-                    css_content = file.read()
-                    backdrop_urls = self.extract_backdrops(css_content)
-                    if isinstance(backdrop_urls, tuple):  # Handle l+d themes
-                        backdrop_urls = backdrop_urls[0] + backdrop_urls[1]
-                    uniq_list = list(dict.fromkeys(backdrop_urls))
-                    self.set_active_backdrop(uniq_list[0])
-                    self.populate_dropdown(uniq_list)
+                # Populate the dropdown with updated backdrops
+                uniq_list = index.backdrop_urls()
+                self.set_active_backdrop(uniq_list[0])
+                self.populate_dropdown(uniq_list)
 
                 # Update the image previews
                 self.update_image_previews()
@@ -472,35 +710,17 @@ class BaseGUI:
         re-populates the dropdown and image previews with restored backdrop.
         """
         if self.last_deleted_url and self.last_deleted_pos_list:
-            # Read the CSS file
-            with open(self.css_file_path, "r") as file:
-                lines = file.readlines()
-
             # Insert the last deleted URL at its original position(s)
-            for pos in self.last_deleted_pos_list:
-                restored_line = (
-                    f"/*{self.theme_config[2]}: url("
-                    f"{self.last_deleted_url});*/\n"
-                )
+            # and write the updated CSS file
+            index = self.backdrop_manager.get_index()
+            index.insert(self.last_deleted_pos_list,
+                         index.declaration(self.last_deleted_url))
+            self.backdrop_manager.save_index()
 
-                # Check if the position is within the bounds of the file
-                if 0 <= pos < len(lines):
-                    # Insert the restored line without adding extra blank lines
-                    lines.insert(pos, restored_line)
-
-            # Write the updated CSS file
-            with open(self.css_file_path, "w") as file:
-                file.writelines(lines)
-
-            # Re-extract and populate the dropdown with updated backdrops
-            with open(self.css_file_path, "r") as file:
-                css_content = file.read()
-                backdrop_urls = self.extract_backdrops(css_content)
-                if isinstance(backdrop_urls, tuple):  # Handle l+d themes
-                    backdrop_urls = backdrop_urls[0] + backdrop_urls[1]
-                uniq_list = list(dict.fromkeys(backdrop_urls))
-                self.backdrop_urls = uniq_list
-                self.populate_dropdown(uniq_list)
+            # Populate the dropdown with updated backdrops
+            uniq_list = index.backdrop_urls()
+            self.backdrop_urls = uniq_list
+            self.populate_dropdown(uniq_list)
 
             # Update the image previews
             self.update_image_previews()
@@ -532,19 +752,120 @@ class BaseGUI:
     def update_image_previews(self):
         """
         Update the image previews when new backdrop url is detected.
+        Only the added or removed previews are changed in the grid.
         """
         if self.img_preview_instance:
-            with open(self.css_file_path, "r") as file:
-                css_content = file.read()
-                img_urls = ImagePreview.extract_image_urls(
-                    css_content,
-                    self.theme_config[2])
-                self.img_preview_instance.img_urls = img_urls
-                self.img_preview_instance.load_images()
+            index = self.backdrop_manager.get_index()
+            self.img_preview_instance.update_urls(index.urls())
+
+    def recheck_previews(self):
+        """
+        Fetch the previews that failed to load again, ignoring the cached
+        failures of dead or non-image urls.
+        """
+        if self.img_preview_instance:
+            self.img_preview_instance.recheck_failed()
+
+    def apply_preview_view(self):
+        """
+        Sort and filter the preview grid by the image statistics chosen in
+        the View menu.
+        """
+        if self.img_preview_instance is None:
+            return
+        if (not ImageStatsIndex.available() and
+                (self.view_sort_var.get() != "file" or
+                 self.view_filter_var.get() != "all")):
+            messagebox.showerror(
+                "Error",
+                "Sorting by image statistics needs numpy "
+                "(pip install numpy).")
+            self.view_sort_var.set("file")
+            self.view_filter_var.set("all")
+            return
+
+        stats = ImageStatsIndex.shared()
+        self.img_preview_instance.set_view(
+            stats.sort_key(self.view_sort_var.get()),
+            stats.filter(self.view_filter_var.get()))
+
+    def zoom_previews(self, step):
+        """
+        Zoom the preview grid in or out by one level.
+
+        Args:
+            step (int): 1 to zoom in, -1 to zoom out.
+        """
+        zoom = self.zoom_var.get() + step
+        if 0 <= zoom < len(ImagePreview.PREVIEW_LEVELS):
+            self.zoom_var.set(zoom)
+            self.apply_preview_zoom()
+
+    def apply_preview_zoom(self):
+        """
+        Switch the preview grid to the zoom level chosen in the View menu.
+        """
+        if self.img_preview_instance is not None:
+            self.img_preview_instance.set_zoom(self.zoom_var.get())
+
+    def find_near_duplicates(self):
+        """
+        Find near-duplicate backdrops among the cached previews in a
+        background thread and show them for cleanup.
+        """
+        preview = self.img_preview_instance
+        if preview is None:
+            messagebox.showerror(
+                "Error", "Please load a CSS file to find near-duplicates.")
+            return
+        if not NearDuplicateFinder.available():
+            messagebox.showerror(
+                "Error",
+                "Finding near-duplicates needs numpy (pip install numpy).")
+            return
+
+        results = queue.Queue()
+        urls = list(preview.url_order)
+
+        def find():
+            thumbnails = {}
+            for url in urls:
+                img = preview.cached_thumbnail(url)
+                if img is not None:
+                    thumbnails[url] = img
+            clusters = NearDuplicateFinder().clusters(
+                list(thumbnails), list(thumbnails.values()))
+            results.put((clusters, thumbnails))
+
+        def show():
+            try:
+                clusters, thumbnails = results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, show)
+                return
+            self.preview_status_var.set(
+                f"Compared {len(thumbnails)} cached previews")
+            NearDuplicateWindow(self.root, clusters, thumbnails,
+                                onselect=self.set_active_backdrop,
+                                ondelete=self.delete_near_duplicate)
+
+        self.preview_status_var.set("Finding near-duplicate backdrops...")
+        threading.Thread(target=find, daemon=True).start()
+        self.root.after(100, show)
+
+    def delete_near_duplicate(self, url):
+        """
+        Select and delete a backdrop from the near-duplicates window.
+
+        Args:
+            url (string): The url of the backdrop to delete.
+        """
+        self.set_active_backdrop(url)
+        self.delete_backdrop()
 
     def setup_status_label(self):
         """
-        Create and position the cycle status label.
+        Create and position the cycle and preview status labels.
         """
         self.cycle_status_label = tk.Label(
             self.root,
@@ -553,6 +874,13 @@ class BaseGUI:
             fg="gray"
         )
         self.cycle_status_label.pack(side=tk.BOTTOM, pady=5)
+        self.preview_status_label = tk.Label(
+            self.root,
+            textvariable=self.preview_status_var,
+            font=("Arial", 9),
+            fg="gray"
+        )
+        self.preview_status_label.pack(side=tk.BOTTOM)
         self.update_cycle_display()
 
     def update_cycle_display(self):
@@ -669,6 +997,9 @@ class BaseGUI:
         Used for if user wants to return to the GUI selector.
         """
         self.stop_cycle()
+        if self.watch_id is not None:
+            self.root.after_cancel(self.watch_id)
+            self.watch_id = None
         self.css_file_path = None
         self.backdrop_manager = None
         self.image_preview_instance = None
@@ -681,6 +1012,7 @@ class BaseGUI:
         """
         Destroy the current GUI and return to the GUI selector.
         """
+        self.save_snapshot()
         self.cleanup()
         self.root.destroy()
         from main import main
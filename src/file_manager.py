@@ -1,6 +1,6 @@
 import sys
 import os
-from image_preview import ImagePreview
+from backdrop_index import BackdropIndex
 
 
 class FileManager:
@@ -37,27 +37,22 @@ class FileManager:
             base_path = os.path.dirname(os.path.abspath(__file__))
         return os.path.join(base_path, relative_path)
 
-    def extract_urls(self, file_path):
+    def read_index(self, file_path):
         """
-        Extract image URLs from the selected CSS file.
+        Read the selected CSS file and index its backdrops in one pass.
 
         Args:
             file_path (str): Path to the CSS file.
 
         Returns:
-            tuple: A tuple containing the CSS content (str)
-            and a list of image URLs (list).
-            Returns (None, []) if an error occurs (Invalid/unreadable file).
+            (BackdropIndex): The index of the file's backdrops.
+            Returns None if an error occurs (Invalid/unreadable file).
         """
         try:
-            with open(file_path, "r") as file:
-                css_content = file.read()
-                img_urls = ImagePreview.extract_image_urls(
-                    css_content, self.theme_config[2])
-                return css_content, img_urls
+            return BackdropIndex.read(file_path, self.theme_config[2])
         except Exception as e:
             print(f"Error reading CSS file: {e}")
-            return None, []
+            return None
 
     def get_version(self):
         """
@@ -0,0 +1,163 @@
+import os
+import time
+import atexit
+import threading
+
+
+class FileWriter:
+    """
+    Writes files on a background thread so the Tkinter thread never waits
+    on the disk. A file is written once no new text came for it in
+    COALESCE_DELAY, or MAX_DELAY after its first unwritten text, so a
+    burst of backdrop selections makes Vencord reload the theme once.
+    Each write goes to a temporary file that then replaces the original,
+    so the file is never seen half written.
+    """
+    COALESCE_DELAY = 0.3  # seconds without writes before a file is written
+    MAX_DELAY = 2.0  # seconds a file's text can wait while it keeps changing
+    FLUSH_TIMEOUT = 10  # seconds to wait for pending files to be written
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, delay=None, max_delay=None):
+        """
+        Initialize the FileWriter and start its writer thread.
+
+        Args:
+            delay (float): The seconds without writes before a file is
+                           written.
+            max_delay (float): The most seconds a file's text waits.
+        """
+        self.delay = self.COALESCE_DELAY if delay is None else delay
+        self.max_delay = self.MAX_DELAY if max_delay is None else max_delay
+        self.pending = {}  # Latest text to write by path
+        self.first = {}  # Time of the first unwritten text by path
+        self.due = {}  # Time each pending path is written at
+        self.writing = set()  # Paths being written
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="file-writer",
+                                       daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the writer instance shared by the whole program, writing its
+        pending files when the program exits.
+
+        Returns:
+            (FileWriter): The shared writer.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+                atexit.register(cls._shared.flush)
+        return cls._shared
+
+    def write(self, path, text):
+        """
+        Queue the new text of a file, replacing any text still waiting
+        to be written to it and putting off the write.
+
+        Args:
+            path (string): The path of the file.
+            text (string): The new content of the file.
+        """
+        with self.condition:
+            now = time.monotonic()
+            self.pending[path] = text
+            first = self.first.setdefault(path, now)
+            # A later due time is picked up when the thread next wakes
+            wake = path not in self.due
+            self.due[path] = min(now + self.delay, first + self.max_delay)
+            if wake:
+                self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Write every pending file now and wait until they are written.
+
+        Args:
+            timeout (float): The most seconds to wait, FLUSH_TIMEOUT if
+                             not given.
+
+        Returns:
+            (boolean): True if every file was written in time.
+        """
+        timeout = self.FLUSH_TIMEOUT if timeout is None else timeout
+        end = time.monotonic() + timeout
+        with self.condition:
+            for path in self.due:
+                self.due[path] = 0
+            self.condition.notify_all()
+            while self.pending or self.writing:
+                remaining = end - time.monotonic()
+                if remaining <= 0 or not self.thread.is_alive():
+                    print("Timed out writing: " +
+                          ", ".join(set(self.pending) | self.writing))
+                    return False
+                self.condition.wait(min(remaining, 0.5))
+        return True
+
+    def is_pending(self, path):
+        """
+        Check if a file has text waiting to be written or being written.
+
+        Args:
+            path (string): The path of the file.
+
+        Returns:
+            (boolean): True if the file is about to change.
+        """
+        with self.condition:
+            return path in self.pending or path in self.writing
+
+    def run(self):
+        """
+        Write pending files once they are due. Runs on the writer thread.
+        """
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    ready = [path for path, due in self.due.items()
+                             if due <= now]
+                    if ready:
+                        break
+                    timeout = (min(self.due.values()) - now
+                               if self.due else None)
+                    self.condition.wait(timeout)
+                writes = [(path, self.pending.pop(path)) for path in ready]
+                for path in ready:
+                    del self.due[path]
+                    del self.first[path]
+                self.writing.update(ready)
+
+            for path, text in writes:
+                try:
+                    self.replace(path, text)
+                finally:
+                    with self.condition:
+                        self.writing.discard(path)
+                        self.condition.notify_all()
+
+    def replace(self, path, text):
+        """
+        Atomically replace the content of a file.
+
+        Args:
+            path (string): The path of the file.
+            text (string): The new content of the file.
+        """
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(temp_path, path)
+        except Exception as e:  # Keep the writer thread running
+            print(f"Failed to write {path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
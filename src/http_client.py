@@ -0,0 +1,209 @@
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.exceptions import TimeoutError as Urllib3Timeout
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    """
+    A shared, keep-alive HTTP session for the program.
+    Applies connect/read timeouts, bounded retries with backoff,
+    and a cap on concurrent requests to the same host. Hosts that can't
+    be reached are reported as unavailable for a while so callers can
+    fall back to cached data instead of waiting on the network.
+    """
+    CONNECT_TIMEOUT = 5  # seconds
+    READ_TIMEOUT = 20  # seconds
+    RETRIES = 3
+    BACKOFF = 0.5  # seconds, doubled between retries
+    POOL_SIZE = 16  # Kept-alive connections per host
+    HOST_LIMIT = 6  # Concurrent requests per host
+    OFFLINE_RETRY = 30  # seconds before an unreachable host is tried again
+
+    # Add headers to mimic a PC browser request so
+    # images can be properly displayed
+    # Imgur & other sites block requests w/o valid User-Agents
+    USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 Chrome/91.0.4472.124 "
+                  "Safari/537.36")  # Emulating a Chrome user on Windows 10
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, host_limit=None):
+        """
+        Initialize the HttpClient with a pooled session and retry policy.
+
+        Args:
+            host_limit (int): The max concurrent requests to a single host.
+        """
+        self.host_limit = host_limit or self.HOST_LIMIT
+        self.host_slots = {}
+        self.unreachable = {}  # Time to try each unreachable host again
+        self.lock = threading.Lock()
+
+        retry = Retry(
+            total=self.RETRIES,
+            connect=self.RETRIES,
+            read=self.RETRIES,
+            backoff_factor=self.BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.POOL_SIZE,
+                              pool_maxsize=self.POOL_SIZE,
+                              max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = self.USER_AGENT
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the client instance shared by the whole program.
+
+        Returns:
+            (HttpClient): The shared client.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+        return cls._shared
+
+    def host_slot(self, url):
+        """
+        Get the semaphore limiting concurrent requests to the url's host.
+
+        Args:
+            url (string): The url being requested.
+
+        Returns:
+            (threading.BoundedSemaphore): The semaphore for the host.
+        """
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(
+                    self.host_limit)
+            return self.host_slots[host]
+
+    def host_available(self, url):
+        """
+        Check if the url's host is expected to be reachable.
+
+        Args:
+            url (string): The url being requested.
+
+        Returns:
+            (boolean): False if the host recently couldn't be reached.
+        """
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            return self.unreachable.get(host, 0) <= time.time()
+
+    def track_host(self, url, reachable):
+        """
+        Record whether the url's host could be reached.
+
+        Args:
+            url (string): The url that was requested.
+            reachable (boolean): Whether a connection was made.
+        """
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if reachable:
+                self.unreachable.pop(host, None)
+            else:
+                self.unreachable[host] = time.time() + self.OFFLINE_RETRY
+
+    @staticmethod
+    def is_timeout(error):
+        """
+        Check if a request error was caused by a timeout. requests raises
+        a ConnectionError for read timeouts that used up the retries or
+        happened while streaming the body, wrapping urllib3's error.
+
+        Args:
+            error (requests.RequestException): The request error.
+
+        Returns:
+            (boolean): True if the request timed out.
+        """
+        if isinstance(error, requests.Timeout):
+            return True
+        cause = error.args[0] if error.args else None
+        cause = getattr(cause, "reason", cause)  # Unwrap MaxRetryError
+        # urllib3 derives failed connections from its connect timeout
+        return (isinstance(cause, Urllib3Timeout) and
+                not isinstance(cause, NewConnectionError))
+
+    def send(self, url, **kwargs):
+        """
+        Send a GET request, tracking whether the host could be reached.
+        Timeouts don't mark the host unreachable, as a slow server or a
+        large image doesn't mean the host is down.
+
+        Args:
+            url (string): The url to request.
+            **kwargs: Extra arguments for requests.Session.get.
+
+        Returns:
+            (requests.Response): The response.
+        """
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.ConnectionError as e:
+            if not self.is_timeout(e):
+                self.track_host(url, False)
+            raise
+        self.track_host(url, True)
+        return response
+
+    def get(self, url, headers=None, timeout=None):
+        """
+        Send a GET request and read the full response body.
+
+        Args:
+            url (string): The url to request.
+            headers (dict): Extra request headers.
+            timeout (tuple): The (connect, read) timeouts in seconds.
+
+        Returns:
+            (requests.Response): The response.
+        """
+        with self.host_slot(url):
+            return self.send(
+                url, headers=headers,
+                timeout=timeout or (self.CONNECT_TIMEOUT, self.READ_TIMEOUT))
+
+    @contextmanager
+    def stream(self, url, headers=None, timeout=None):
+        """
+        Send a GET request and stream the response body.
+        The host slot is held until the body has been consumed.
+
+        Args:
+            url (string): The url to request.
+            headers (dict): Extra request headers.
+            timeout (tuple): The (connect, read) timeouts in seconds.
+
+        Yields:
+            (requests.Response): The streamed response.
+        """
+        with self.host_slot(url):
+            response = self.send(
+                url, headers=headers, stream=True,
+                timeout=timeout or (self.CONNECT_TIMEOUT, self.READ_TIMEOUT))
+            try:
+                yield response
+            finally:
+                response.close()
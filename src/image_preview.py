@@ -1,15 +1,107 @@
+import os
+import time
+import heapq
+import hashlib
+import queue
+import itertools
+import threading
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk, UnidentifiedImageError
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image, ImageDraw, ImageFile, UnidentifiedImageError
 import requests
 from io import BytesIO
+from thumbnail_cache import (FailureCache, MemoryThumbnailCache,
+                             ThumbnailCache)
+from image_stats import ImageStatsIndex
+from http_client import HttpClient
+from preview_renderers import CanvasRenderer, LabelRenderer
+
+
+class ImageTooLarge(Exception):
+    """
+    Raised when a preview image is over the download or pixel limits.
+    """
+
+
+def decode_thumbnail(data, max_pixels):
+    """
+    Decode an image and resize it into a thumbnail at every zoom level.
+    Module level so it can run in a decode process, returning the
+    thumbnails as compact raw pixel buffers.
+
+    Args:
+        data (bytes): The encoded image.
+        max_pixels (int): The largest image (width * height) to decode.
+
+    Returns:
+        (tuple): The (mode, size, raw pixel bytes) of each thumbnail,
+                 and the full size of the image.
+
+    Raises:
+        ImageTooLarge: If the image has too many pixels.
+    """
+    img = Image.open(BytesIO(data))
+    if img.width * img.height > max_pixels:
+        raise ImageTooLarge(f"{img.width}x{img.height} pixels")
+    native_size = img.size  # Before a JPEG draft reduces it
+    return ([(level.mode, level.size, level.tobytes())
+             for level in ImagePreview.resize_levels(img)], native_size)
 
 
 class ImagePreview:
     """
     A class to display image previews of backdrop urls in a scrollable grid.
+    Only the rows in or near the viewport are drawn and fetched, and drawn
+    previews are reused as the grid scrolls. Images are fetched and decoded
+    by a pool of worker threads and handed back to the Tkinter thread.
+    Cached thumbnails are shown right away and revalidated in the
+    background whenever their host can be reached. Urls with identical
+    image content share one thumbnail and are flagged as duplicates.
+    Thumbnails are cached at every zoom level from a single decode, so
+    the grid can be zoomed without fetching or decoding again.
     """
-    def __init__(self, root, img_urls, onclick=None):
+    MAX_WORKERS = 8  # Concurrent image downloads
+    POLL_INTERVAL = 50  # ms between checks for finished previews
+    MAX_PER_POLL = 10  # Finished previews added to the grid per check
+    MAX_DOWNLOAD_BYTES = 16 * 1024 * 1024  # Hard cap per preview download
+    MAX_PIXELS = 50_000_000  # Decompression bomb guard (width * height)
+    CHUNK_SIZE = 64 * 1024
+    TILE_PADDING = 5  # Space around each preview
+    OVERSCAN_ROWS = 2  # Rows above/below the viewport kept loaded
+    RESIZE_DELAY = 60  # ms to wait for resize events to settle
+    RECONNECT_INTERVAL = 15000  # ms between checks for unreachable hosts
+    STATS_BATCH = 64  # Thumbnails per image statistics batch
+    # Thumbnail sizes of the zoom levels, smallest first
+    PREVIEW_LEVELS = ((100, 80), (125, 100), (200, 160))
+    DEFAULT_ZOOM = 1
+    # Fetch priorities, lower values are fetched first
+    PRIORITY_ACTIVE = 0  # The active backdrop
+    PRIORITY_VISIBLE = 1  # Previews in the viewport
+    PRIORITY_NEARBY = 2  # Previews in the rows around the viewport
+    PRIORITY_REVALIDATE = 3  # Cached previews shown in or near the viewport
+    # Processes for decoding images, opt-in with this environment variable
+    # as a number or "auto" for one per core. Unset or 0 decodes in the
+    # download threads instead
+    DECODE_PROCESSES_VAR = "VCTHEMEGUI_DECODE_PROCESSES"
+
+    _decode_pool = None
+    _decode_lock = threading.Lock()
+
+    RENDERERS = {"canvas": CanvasRenderer, "label": LabelRenderer}
+    # Placeholder text by failure class
+    FAILURE_LABELS = {
+        "not_found": "Not found",
+        "not_image": "Not an image",
+        "too_large": "Too large",
+        "timeout": "Timed out",
+        "error": "Unavailable",
+        "offline": "Offline",
+    }
+
+    def __init__(self, root, img_urls, onclick=None, renderer="canvas",
+                 onstatus=None, zoom=DEFAULT_ZOOM, active_url=None):
         """
         Initialize the ImagePreview with the root window and image urls.
 
@@ -17,13 +109,61 @@ class ImagePreview:
             root (tk.Tk): The window for the image preview.
             img_urls (list): A list of image URLs to be displayed.
             onclick (function): Function called when image is clicked (event).
+            renderer (string): How previews are drawn, either "canvas" for
+                               image items on one canvas or "label" for a
+                               label widget per preview.
+            onstatus (function): Function called with a status message
+                                 about stale previews (text).
+            zoom (int): The index of the zoom level in PREVIEW_LEVELS.
+            active_url (string): The url of the active backdrop, which is
+                                 highlighted and fetched first.
         """
         self.root = root
         self.img_urls = img_urls
-        self.img_labels = []
-        self.loaded_urls = set()
-        self.preview_size = (125, 100)  # Set fixed size for all previews
+        self.url_index = {}  # Grid position of each displayed url
+        self.url_order = []  # Displayed urls in grid order
+        self.fetching_urls = set()  # Urls queued or being fetched
+        self.failed = {}  # Failure class of urls that couldn't load
+        self.placeholders = {}  # Failure placeholders by label
+        self.loading_urls = set()  # Urls drawn with the loading placeholder
+        self.stale_urls = set()  # Urls shown from cache, not revalidated
+        self.fresh_urls = set()  # Urls downloaded or revalidated
+        self.offline_urls = set()  # Uncached urls whose host was unreachable
+        self.url_digests = {}  # Content hash of each loaded url
+        self.hash_urls = {}  # Loaded urls by content hash
+        self.badged_urls = set()  # Urls drawn with the duplicate badge
+        self.badges = {}  # Duplicate badged thumbnails by content hash
+        self.view_key = None  # Sort key for the grid order
+        self.view_filter = None  # Predicate for urls shown in the grid
+        self.active_url = active_url
+        self.num_columns = 1
+        self.zoom = zoom
+        self.preview_size = self.PREVIEW_LEVELS[zoom]
         self.onclick = onclick
+        self.onstatus = onstatus
+        self.loading_img = self.make_placeholder("Loading...")
+        self.thumb_cache = ThumbnailCache.shared()
+        self.memory_cache = MemoryThumbnailCache.shared()
+        self.failure_cache = FailureCache.shared()
+        self.stats = ImageStatsIndex.shared()
+        self.stats_checked = set()  # Urls already tried for statistics
+        self.stats_future = None
+        self.http = HttpClient.shared()
+
+        # Worker pool for fetching images off the Tkinter thread
+        self.executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS,
+                                           thread_name_prefix="preview")
+        self.results = queue.Queue()
+        self.load_generation = 0  # Ignore results from outdated loads
+        # Urls waiting to be fetched, workers take the best priority first
+        self.fetch_queue = []  # Heap of (priority, order, url)
+        self.queued = {}  # Current priority of each waiting url
+        self.queue_lock = threading.Lock()
+        self.queue_order = itertools.count()
+        self.poll_id = None
+        self.resize_id = None
+        self.reconnect_id = None
+        self.closed = False  # Set once the grid is destroyed
 
         main_frame = tk.Frame(root)
         main_frame.pack(fill="both", expand=True)
@@ -31,23 +171,23 @@ class ImagePreview:
         self.canvas = tk.Canvas(main_frame)
         self.scrollbar = ttk.Scrollbar(main_frame, orient="vertical",
                                        command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-
-        self.scrollable_frame.bind("<Configure>", self.update_scrollregion)
-        self.canvas.create_window((0, 0), window=self.scrollable_frame,
-                                  anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.renderer = self.RENDERERS[renderer](self)
+        self.renderer.highlight(active_url)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
 
+        # Stop fetching images once the preview grid is destroyed
+        main_frame.bind("<Destroy>", self.shutdown)
+
         # Bind the mouse scroll wheel to canvas to scroll images
         self.canvas.bind_all("<MouseWheel>", self.on_mouse_wheel)
 
         self.load_images()
 
         # Bind resize event to adjust window layout with images
-        root.bind("<Configure>", self.on_resize)
+        self.configure_id = root.bind("<Configure>", self.on_resize)
 
     def is_valid_image_url(self, url):
         """
@@ -66,123 +206,992 @@ class ImagePreview:
         """
         Load the images from the provided urls and display them in the grid.
         Checks for valid image urls and skips invalid or broken urls.
+        Only images in or near the visible part of the grid are fetched.
         """
         self.clear_existing_images()
-        for i, url in enumerate(self.img_urls):
-            if url not in self.loaded_urls:
-                try:
-                    # Skip invalid URLs
-                    if not self.is_valid_image_url(url):
-                        print(f"Skipping invalid image URL: {url}")
-                        continue
-
-                    # Add headers to mimic a PC browser request so
-                    # images can be properly displayed
-                    # Imgur & other sites block requests w/o valid User-Agents
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; "
-                        "x64) AppleWebKit/537.36 "
-                        "Chrome/91.0.4472.124 Safari/537.36"
-                    }  # Emulating a Chrome user on Windows 10
-
-                    # Fetch the image from the URL and check validity/status
-                    response = requests.get(url, headers=headers)
-                    response.raise_for_status()
-
-                    # Check if the response contains valid image data
-                    if "image" in response.headers.get("Content-Type", ""):
-                        # Load the image using Pillow/PIL
-                        img_data = response.content
-                        img = Image.open(BytesIO(img_data))
-                        img = self.resize_and_crop(img, self.preview_size)
-                        img.thumbnail((150, 150))  # Resize img to fit
-                        # Convert the the PIL image to Tkinter
-                        tk_img = ImageTk.PhotoImage(img)
-                        # Create a label to display the image
-                        img_label = tk.Label(self.scrollable_frame,
-                                             image=tk_img)
-                        img_label.img = tk_img
-                        img_label.url = url
-
-                        # Clickable previews
-                        if self.onclick:
-                            img_label.bind("<Button-1>", lambda e,
-                                           u=url: self.onclick(u))
-
-                        img_label.grid(row=i // 3, column=i % 3,
-                                       padx=5, pady=5)
-                        self.img_labels.append(img_label)
-                        self.loaded_urls.add(url)
-                        print(f"Loaded image {url} at row "
-                              f"{i // self.get_num_columns()} and column "
-                              f"{i % self.get_num_columns()}")
-                    else:
-                        print(f"Skipping non-image URL: {url}")
-                except (requests.RequestException,
-                        UnidentifiedImageError) as e:
-                    print(f"Failed to load image from {url}: {e}")
-
-        # Resize image previews after loaded for first time
-        self.on_resize(None)
-        self.update_scrollregion()
-
-    def resize_and_crop(self, img, size):
+        self.load_generation += 1
+        self.update_urls(self.img_urls)
+
+    def update_urls(self, img_urls):
+        """
+        Update the grid to match a new list of image urls.
+        Only fetches images for new urls, removes previews of urls that are
+        no longer listed and moves the remaining previews into order.
+
+        Args:
+            img_urls (list): The new list of image URLs to display.
+        """
+        self.img_urls = img_urls
+        urls = {}
+        for url in img_urls:
+            if url in urls:
+                continue
+            # Skip invalid URLs
+            if not self.is_valid_image_url(url):
+                print(f"Skipping invalid image URL: {url}")
+                continue
+            urls[url] = True
+
+        # Apply the sorting and filtering chosen for the grid
+        urls = list(urls)
+        if self.view_filter is not None:
+            urls = [url for url in urls if self.view_filter(url)]
+        if self.view_key is not None:
+            urls.sort(key=self.view_key)
+        url_index = {url: index for index, url in enumerate(urls)}
+        self.url_index = url_index
+        self.url_order = urls
+
+        # Drop previews of removed urls
+        for url in self.renderer.shown_urls():
+            if url not in url_index:
+                self.hide_tile(url)
+        for url in list(self.failed):
+            if url not in url_index:
+                del self.failed[url]
+
+        self.num_columns = self.get_num_columns()
+        self.update_content_size()
+        self.refresh_viewport(relayout=True)
+
+    def set_view(self, key=None, keep=None):
+        """
+        Sort and filter the grid, like by the image statistics.
+
+        Args:
+            key (function): Sort key for the urls (url), or None to keep
+                            the file order.
+            keep (function): Returns if a url is shown (url), or None to
+                             show every url.
+        """
+        self.view_key = key
+        self.view_filter = keep
+        self.update_urls(self.img_urls)
+
+    def set_zoom(self, zoom):
+        """
+        Switch the grid to another zoom level. Thumbnails are shown from
+        the memory or disk cache of the new level without any network
+        requests, only images that were never cached are fetched.
+
+        Args:
+            zoom (int): The index of the zoom level in PREVIEW_LEVELS.
+        """
+        zoom = max(0, min(zoom, len(self.PREVIEW_LEVELS) - 1))
+        if zoom == self.zoom:
+            return
+        start = time.perf_counter()
+        # Fetches for the old size are no longer wanted
+        self.load_generation += 1
+        with self.queue_lock:
+            self.fetch_queue = []
+            self.queued = {}
+            self.fetching_urls = set()
+
+        for url in self.renderer.shown_urls():
+            self.hide_tile(url)
+        self.zoom = zoom
+        self.preview_size = self.PREVIEW_LEVELS[zoom]
+        self.loading_img = self.make_placeholder("Loading...")
+        self.placeholders = {}
+        self.badges = {}
+
+        self.num_columns = self.get_num_columns()
+        self.update_content_size()
+        self.refresh_viewport(relayout=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Zoomed previews to {self.preview_size[0]}x"
+              f"{self.preview_size[1]} in {elapsed:.1f} ms")
+
+    def visible_range(self, overscan=OVERSCAN_ROWS):
+        """
+        Get the range of grid positions in or near the visible viewport.
+
+        Args:
+            overscan (int): The rows above and below the viewport to include.
+
+        Returns:
+            (range): The grid positions to display.
+        """
+        cell_height = self.preview_size[1] + 2 * self.TILE_PADDING
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), cell_height)
+        first_row = max(0, int(top // cell_height) - overscan)
+        last_row = int(bottom // cell_height) + overscan + 1
+        return range(first_row * self.num_columns,
+                     min(len(self.url_index), last_row * self.num_columns))
+
+    def refresh_viewport(self, relayout=False):
+        """
+        Show previews for the grid positions in or near the viewport,
+        recycling the previews that scrolled out of view. Positions without
+        a decoded image get a loading placeholder and are queued for
+        fetching, with the active backdrop and the viewport first.
+
+        Args:
+            relayout (boolean): Whether to move previews that are kept,
+                                for when the grid order or columns changed.
+        """
+        visible = [self.url_order[i] for i in self.visible_range()]
+        in_view = self.visible_range(overscan=0)
+        visible_set = set(visible)
+
+        for url in self.renderer.shown_urls():
+            if url not in visible_set:
+                self.hide_tile(url)
+
+        wanted = {}
+        for url in visible:
+            if (url in self.renderer and url not in self.loading_urls and
+                    self.is_duplicate(url) == (url in self.badged_urls)):
+                if relayout:
+                    self.renderer.move(url, self.tile_position(url))
+                self.want_revalidation(url, wanted)
+                continue
+
+            img = self.thumbnail(url)
+            if img is not None:
+                if url in self.renderer:
+                    self.hide_tile(url)
+                self.renderer.show(url, img, self.tile_position(url))
+                if self.is_duplicate(url):
+                    self.badged_urls.add(url)
+                self.want_revalidation(url, wanted)
+                continue
+
+            if url not in self.renderer:
+                self.renderer.show(url, self.loading_img,
+                                   self.tile_position(url))
+                self.loading_urls.add(url)
+            elif relayout:
+                self.renderer.move(url, self.tile_position(url))
+            wanted[url] = (self.PRIORITY_VISIBLE
+                           if self.url_index[url] in in_view
+                           else self.PRIORITY_NEARBY)
+
+        if (self.active_url in self.url_index and
+                self.thumbnail(self.active_url) is None):
+            wanted[self.active_url] = self.PRIORITY_ACTIVE
+        self.queue_fetches(wanted)
+
+    def want_revalidation(self, url, wanted):
+        """
+        Queue a stale preview for revalidation if its host is reachable.
+
+        Args:
+            url (string): The url of the image.
+            wanted (dict): The fetch priority of each wanted url.
+        """
+        if url in self.stale_urls and self.http.host_available(url):
+            wanted[url] = self.PRIORITY_REVALIDATE
+
+    def hide_tile(self, url):
+        """
+        Hide the drawn preview of a url.
+
+        Args:
+            url (string): The url of the image.
+        """
+        self.renderer.hide(url)
+        self.loading_urls.discard(url)
+        self.badged_urls.discard(url)
+
+    def queue_fetches(self, wanted):
+        """
+        Queue fetches for the wanted urls by priority. Queued urls that are
+        no longer wanted, like ones scrolled far out of view, are dropped.
+
+        Args:
+            wanted (dict): The fetch priority of each wanted url.
+        """
+        new_urls = 0
+        with self.queue_lock:
+            for url in list(self.queued):
+                if url not in wanted:
+                    del self.queued[url]
+                    self.fetching_urls.discard(url)
+
+            for url, priority in wanted.items():
+                if url in self.fetching_urls and url not in self.queued:
+                    continue  # Already being fetched
+                if self.queued.get(url, priority + 1) <= priority:
+                    continue  # Already queued at this priority
+                if url not in self.queued:
+                    new_urls += 1
+                self.queued[url] = priority
+                self.fetching_urls.add(url)
+                heapq.heappush(self.fetch_queue,
+                               (priority, next(self.queue_order), url))
+
+        # One task per new url, each fetches the best url waiting when run
+        for _ in range(new_urls):
+            self.executor.submit(self.fetch_next, self.load_generation)
+        self.schedule_poll()
+
+    def fetch_next(self, generation):
+        """
+        Fetch the waiting url with the best priority. Runs on a worker
+        thread; skips queue entries that were dropped or re-prioritized.
+
+        Args:
+            generation (int): The load the task belongs to.
+        """
+        with self.queue_lock:
+            while True:
+                if generation != self.load_generation or not self.fetch_queue:
+                    return
+                priority, _, url = heapq.heappop(self.fetch_queue)
+                if self.queued.get(url) == priority:
+                    del self.queued[url]
+                    break
+        self.fetch_image(generation, url,
+                         revalidate=priority == self.PRIORITY_REVALIDATE)
+
+    def thumbnail(self, url):
+        """
+        Get the loaded thumbnail or placeholder of a url.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            img (PIL.Image): The thumbnail, or None if not loaded.
+        """
+        # Known-bad urls are marked without fetching them again
+        reason = self.failed.get(url) or self.failure_cache.get(url)
+        if reason is not None:
+            self.failed[url] = reason
+            return self.failure_placeholder(reason)
+        img = self.memory_cache.get(url, self.preview_size)
+        if img is not None and self.is_duplicate(url):
+            return self.duplicate_badge(self.url_digests[url], img)
+        return img
+
+    def failure_placeholder(self, reason):
+        """
+        Get the placeholder for a failure class, shared by every url that
+        failed the same way.
+
+        Args:
+            reason (string): The failure class.
+
+        Returns:
+            img (PIL.Image): The placeholder image.
+        """
+        label = self.FAILURE_LABELS[reason]
+        if label not in self.placeholders:
+            self.placeholders[label] = self.make_placeholder(label)
+        return self.placeholders[label]
+
+    def cached_thumbnail(self, url):
+        """
+        Get a url's thumbnail from the memory or disk cache without any
+        network requests. Safe to call from worker threads.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            img (PIL.Image): The thumbnail, or None if not cached.
+        """
+        img = self.memory_cache.get(url, self.preview_size)
+        if img is None:
+            img = self.thumb_cache.load(url, self.preview_size)
+        return img
+
+    def url_digest(self, url):
+        """
+        Get the content hash of a loaded url.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            digest (string): The SHA-256 hex digest, or None if unknown.
+        """
+        digest = self.memory_cache.digest(url, self.preview_size)
+        old = self.url_digests.get(url)
+        if digest != old:
+            if old is not None:
+                self.hash_urls[old].discard(url)
+            if digest is not None:
+                self.hash_urls.setdefault(digest, set()).add(url)
+                self.url_digests[url] = digest
+            else:
+                del self.url_digests[url]
+        return digest
+
+    def is_duplicate(self, url):
+        """
+        Check if another url in the grid has the same image content.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            (boolean): True if the url's image is a duplicate.
+        """
+        digest = self.url_digest(url)
+        if digest is None:
+            return False
+        return sum(1 for other in self.hash_urls[digest]
+                   if other in self.url_index) > 1
+
+    def duplicate_urls(self):
+        """
+        Get the groups of urls in the grid with the same image content.
+        Only urls whose images have been loaded are compared.
+
+        Returns:
+            (list): Lists of urls sharing an image, in grid order.
+        """
+        groups = {}
+        for url in self.url_order:
+            digest = self.url_digests.get(url)
+            if digest is not None:
+                groups.setdefault(digest, []).append(url)
+        return [urls for urls in groups.values() if len(urls) > 1]
+
+    def duplicate_badge(self, digest, img):
+        """
+        Get a thumbnail marked as a duplicate, shared by every url with
+        the same content.
+
+        Args:
+            digest (string): The SHA-256 hex digest of the image data.
+            img (PIL.Image): The thumbnail.
+
+        Returns:
+            badge (PIL.Image): The marked thumbnail.
+        """
+        badge = self.badges.get(digest)
+        if badge is None:
+            badge = img.copy()
+            draw = ImageDraw.Draw(badge)
+            left, top, right, bottom = draw.textbbox((0, 0), "Duplicate")
+            draw.rectangle((0, 0, right - left + 6, bottom - top + 6),
+                           fill="#cc3333")
+            draw.text((3 - left, 3 - top), "Duplicate", fill="white")
+            self.badges[digest] = badge
+        return badge
+
+    def fetch_image(self, generation, url, revalidate=False):
+        """
+        Fetch and resize a single image. Runs on a worker thread, so it
+        must not touch any Tkinter widgets; the result is queued for the
+        Tkinter thread instead. Cached thumbnails are returned without a
+        request, as stale unless they were already downloaded or
+        revalidated, and are only requested again when being revalidated.
+
+        Args:
+            generation (int): The load the request belongs to.
+            url (string): The url of the image to fetch.
+            revalidate (boolean): Whether to check a cached thumbnail
+                                  with the server.
+        """
+        img = None
+        problem = None
+        stale = False
+        digest = None
+        try:
+            cached_img = self.thumb_cache.load(url, self.preview_size)
+            if cached_img is not None and not revalidate:
+                img = cached_img
+                digest = self.cached_digest(url)
+                stale = url not in self.fresh_urls
+            elif not self.http.host_available(url):
+                problem = "offline"
+            else:
+                img, digest = self.download(url, cached_img)
+                if img is None:
+                    problem = "not_image"
+        except (ImageTooLarge, Image.DecompressionBombError) as e:
+            print(f"Image too large to preview from {url}: {e}")
+            problem = "too_large"
+        except requests.HTTPError as e:
+            print(f"Failed to load image from {url}: {e}")
+            status = e.response.status_code if e.response is not None else 0
+            problem = "not_found" if status in (404, 410) else "error"
+        except requests.ConnectionError as e:
+            # Also raised for timeouts, which aren't the host being down
+            if HttpClient.is_timeout(e):
+                print(f"Timed out loading image from {url}: {e}")
+                problem = "timeout"
+            else:
+                print(f"Failed to connect for image from {url}: {e}")
+                problem = "offline"
+        except requests.Timeout as e:
+            print(f"Timed out loading image from {url}: {e}")
+            problem = "timeout"
+        except UnidentifiedImageError as e:
+            print(f"Failed to load image from {url}: {e}")
+            problem = "not_image"
+        except (requests.RequestException, OSError) as e:
+            print(f"Failed to load image from {url}: {e}")
+            problem = "error"
+        self.results.put((generation, url, img, problem, stale, digest))
+
+    def cached_digest(self, url):
+        """
+        Get the content hash recorded for a url's cached thumbnail.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            (string): The SHA-256 hex digest, or None if unknown.
+        """
+        entry = self.thumb_cache.get(url, self.preview_size)
+        return entry.get("hash") if entry else None
+
+    def download(self, url, cached_img=None):
+        """
+        Download and resize an image at every zoom level, revalidating
+        the cached thumbnail with a conditional request instead of
+        downloading it again. Images already cached under another url
+        aren't decoded again.
+
+        Args:
+            url (string): The url of the image to fetch.
+            cached_img (PIL.Image): The cached thumbnail, if any.
+
+        Returns:
+            (tuple): The thumbnail, or None if the url isn't an image,
+                     and the SHA-256 hex digest of the image data.
+        """
+        headers = {}
+        if cached_img is not None:
+            headers = self.thumb_cache.validators(
+                self.thumb_cache.get(url, self.preview_size))
+
+        # Fetch the image from the URL and check validity/status
+        with self.http.stream(url, headers=headers) as response:
+            if response.status_code == 304 and cached_img is not None:
+                return cached_img, self.cached_digest(url)
+            response.raise_for_status()
+
+            # Check if the response contains valid image data
+            if "image" not in response.headers.get("Content-Type", ""):
+                print(f"Skipping non-image URL: {url}")
+                return None, None
+
+            # Load the image using Pillow/PIL
+            data, digest, img = self.read_image(response)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if digest is not None and self.thumb_cache.share(
+                    url, digest, etag, last_modified):
+                cached = self.thumb_cache.load(url, self.preview_size)
+                if cached is not None:
+                    return cached, digest
+            images = self.decode(data, img)
+            self.thumb_cache.store(url, images, etag, last_modified, digest)
+            return images[self.zoom], digest
+
+    def read_image(self, response):
+        """
+        Stream an image response up to the download byte cap, hashing
+        the data as it arrives. GIFs have their first frame decoded as it
+        downloads, since only the first frame is shown, and the rest of
+        the file is only hashed, not kept. A GIF over the byte cap past
+        its first frame gets no hash, as a hash of part of the file
+        wouldn't identify its content.
+
+        Args:
+            response (requests.Response): The streamed image response.
+
+        Returns:
+            (tuple): The downloaded image data, or None if the image was
+                     decoded while downloading, the SHA-256 hex digest of
+                     the data, or None, and the decoded image, or None.
+
+        Raises:
+            ImageTooLarge: If the image is over the byte or pixel limits.
+        """
+        content_type = response.headers.get("Content-Type", "")
+        length = int(response.headers.get("Content-Length") or 0)
+        parser = ImageFile.Parser() if "gif" in content_type else None
+        if parser is None and length > self.MAX_DOWNLOAD_BYTES:
+            raise ImageTooLarge(f"{length} bytes")
+
+        data = bytearray()
+        sha = hashlib.sha256()
+        img = None
+        total = 0
+        for chunk in response.iter_content(self.CHUNK_SIZE):
+            total += len(chunk)
+            if total > self.MAX_DOWNLOAD_BYTES:
+                if img is None:
+                    raise ImageTooLarge(
+                        f"over {self.MAX_DOWNLOAD_BYTES} bytes")
+                sha = None
+                break
+            sha.update(chunk)
+            if img is not None:
+                continue  # Only hashing the rest of the GIF
+            data += chunk
+            if parser is None:
+                continue
+            try:
+                parser.feed(chunk)
+                if parser.image is not None:
+                    self.check_pixels(parser.image)
+                if parser.finished:  # First frame is complete
+                    img = parser.close()
+                    data = None
+            except OSError:  # Can't decode incrementally, read it all
+                parser = None
+        return (data and bytes(data), sha and sha.hexdigest(), img)
+
+    def decode(self, data, img=None):
+        """
+        Decode downloaded image data once into a thumbnail at every zoom
+        level, in the decode process pool if enabled or on the current
+        thread otherwise.
+
+        Args:
+            data (bytes): The downloaded image data.
+            img (PIL.Image): The image already decoded while downloading,
+                             used instead of the data.
+
+        Returns:
+            images (list): The thumbnail (PIL.Image) at each zoom level,
+                           with the full size of the image in their info
+                           as "native_size".
+
+        Raises:
+            ImageTooLarge: If the image has too many pixels.
+        """
+        pool = self.decode_pool() if img is None else None
+        if pool is not None:
+            try:
+                levels, native_size = pool.submit(
+                    decode_thumbnail, data, self.MAX_PIXELS).result()
+                images = [Image.frombytes(mode, size, pixels)
+                          for mode, size, pixels in levels]
+            except BrokenProcessPool as e:
+                print(f"Decode processes stopped, decoding in threads: {e}")
+                ImagePreview._decode_pool = False
+                pool = None
+        if pool is None:
+            if img is None:
+                img = Image.open(BytesIO(data))
+            self.check_pixels(img)
+            native_size = img.size
+            images = self.resize_levels(img)
+        for img in images:
+            img.info["native_size"] = native_size
+        return images
+
+    @classmethod
+    def resize_levels(cls, img):
+        """
+        Resize an image into a thumbnail at every zoom level. The largest
+        thumbnail is resized from the image and the smaller ones from the
+        largest thumbnail.
+
+        Args:
+            img (PIL.Image): The image to resize.
+
+        Returns:
+            images (list): The thumbnail (PIL.Image) at each zoom level.
+        """
+        largest = cls.resize_and_crop(img, cls.PREVIEW_LEVELS[-1])
+        return [largest if size == largest.size else
+                cls.resize_and_crop(largest, size)
+                for size in cls.PREVIEW_LEVELS]
+
+    @classmethod
+    def decode_processes(cls):
+        """
+        Get the number of decode processes set in the environment.
+
+        Returns:
+            (int): The number of processes, 0 to decode in threads.
+        """
+        value = os.environ.get(cls.DECODE_PROCESSES_VAR, "").strip()
+        if value.lower() == "auto":
+            return os.cpu_count() or 1
+        try:
+            return max(0, int(value or 0))
+        except ValueError:
+            print(f"Ignoring {cls.DECODE_PROCESSES_VAR}={value!r}, "
+                  "decoding in threads")
+            return 0
+
+    @classmethod
+    def decode_pool(cls):
+        """
+        Get the process pool shared by every preview grid for decoding,
+        creating it on first use.
+
+        Returns:
+            (ProcessPoolExecutor): The pool, or None if disabled or if its
+                                   processes stopped.
+        """
+        with cls._decode_lock:
+            if cls._decode_pool is None:
+                processes = min(cls.decode_processes(), os.cpu_count() or 1)
+                if processes:
+                    print(f"Decoding previews in {processes} processes")
+                    cls._decode_pool = ProcessPoolExecutor(
+                        max_workers=processes)
+                else:
+                    cls._decode_pool = False  # Decode in threads
+        return cls._decode_pool or None
+
+    def check_pixels(self, img):
+        """
+        Guard against decompression bombs before an image is decoded.
+
+        Args:
+            img (PIL.Image): The opened image.
+
+        Raises:
+            ImageTooLarge: If the image has too many pixels.
+        """
+        if img.width * img.height > self.MAX_PIXELS:
+            raise ImageTooLarge(f"{img.width}x{img.height} pixels")
+
+    def make_placeholder(self, text):
+        """
+        Create a preview sized placeholder image with a short message.
+
+        Args:
+            text (string): The message to show on the placeholder.
+
+        Returns:
+            img (PIL.Image): The placeholder image.
+        """
+        img = Image.new("RGB", self.preview_size, "#d9d9d9")
+        draw = ImageDraw.Draw(img)
+        left, top, right, bottom = draw.textbbox((0, 0), text)
+        draw.text(((img.width - right + left) / 2,
+                   (img.height - bottom + top) / 2), text, fill="#555555")
+        return img
+
+    def schedule_poll(self):
+        """
+        Schedule a check for finished images on the Tkinter thread.
+        """
+        if self.closed:
+            return
+        if self.poll_id is None and (self.fetching_urls or
+                                     self.stats_future is not None):
+            self.poll_id = self.root.after(self.POLL_INTERVAL,
+                                           self.poll_results)
+
+    def poll_results(self):
+        """
+        Add finished images to the grid. Runs on the Tkinter thread through
+        after() so the window stays responsive while images are loading.
+        """
+        self.poll_id = None
+        if self.closed:
+            return
+        added = False
+        for _ in range(self.MAX_PER_POLL):
+            try:
+                (generation, url, img, problem, stale,
+                 digest) = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            # Results from a previous load are no longer wanted
+            if generation != self.load_generation:
+                continue
+            self.fetching_urls.discard(url)
+            if img is not None:
+                # Kept even if the url was removed meanwhile, for restores
+                self.memory_cache.put(url, img.size, img, digest)
+                if stale:
+                    self.stale_urls.add(url)
+                else:
+                    self.fresh_urls.add(url)
+                    if url in self.stale_urls:
+                        # Redraw with the revalidated thumbnail
+                        self.stale_urls.discard(url)
+                        if url in self.renderer:
+                            self.hide_tile(url)
+            elif url in self.stale_urls:
+                # Keep showing the cached thumbnail, unreachable hosts
+                # are retried once they are back
+                if problem != "offline":
+                    self.stale_urls.discard(url)
+            else:
+                self.failure_cache.record(url, problem)
+                if url in self.url_index:
+                    self.failed[url] = problem
+                    if problem == "offline":
+                        self.offline_urls.add(url)
+            added = True
+
+        if added:
+            self.refresh_viewport()
+            self.update_status()
+        if self.stats_future is not None and self.stats_future.done():
+            self.stats_future = None
+            # Place the newly indexed urls
+            if self.view_key is not None or self.view_filter is not None:
+                self.update_urls(self.img_urls)
+        if not self.fetching_urls:
+            self.thumb_cache.flush()
+            self.failure_cache.flush()
+            self.schedule_stats()
+        self.schedule_poll()
+        self.schedule_reconnect()
+
+    def schedule_stats(self):
+        """
+        Index the statistics of the grid's cached thumbnails in the
+        background once no images are being fetched.
+        """
+        if self.closed:
+            return
+        if self.stats_future is not None or not self.stats.available():
+            return
+        urls = [url for url in self.stats.missing(self.img_urls)
+                if url not in self.stats_checked]
+        if urls:
+            self.stats_checked.update(urls)
+            self.stats_future = self.executor.submit(self.index_stats, urls)
+
+    def index_stats(self, urls):
+        """
+        Compute the statistics of cached thumbnails in batches.
+        Runs on a worker thread.
+
+        Args:
+            urls (list): The urls to index.
+        """
+        for start in range(0, len(urls), self.STATS_BATCH):
+            batch_urls, images, native_sizes = [], [], []
+            for url in urls[start:start + self.STATS_BATCH]:
+                img = self.cached_thumbnail(url)
+                if img is None or img.size != self.preview_size:
+                    continue
+                entry = self.thumb_cache.get(url, self.preview_size)
+                batch_urls.append(url)
+                images.append(img)
+                native_sizes.append(entry.get("native_size")
+                                    if entry else None)
+            self.stats.add(batch_urls, images, native_sizes)
+        self.stats.flush()
+
+    def schedule_reconnect(self):
+        """
+        Schedule a check for hosts that are reachable again while previews
+        are stale or offline.
+        """
+        if self.closed:
+            return
+        if self.reconnect_id is None and (self.stale_urls or
+                                          self.offline_urls):
+            self.reconnect_id = self.root.after(self.RECONNECT_INTERVAL,
+                                                self.reconnect)
+
+    def reconnect(self):
+        """
+        Fetch the offline previews and revalidate the stale previews whose
+        host may be reachable again.
+        """
+        self.reconnect_id = None
+        if self.closed:
+            return  # The canvas is gone
+        for url in list(self.offline_urls):
+            if self.http.host_available(url):
+                self.offline_urls.discard(url)
+                if self.failed.pop(url, None) is not None:
+                    if url in self.renderer:
+                        self.hide_tile(url)
+        self.refresh_viewport()
+        self.update_status()
+        self.schedule_reconnect()
+
+    def update_status(self):
+        """
+        Report how many previews in the grid are stale or offline.
+        """
+        if not self.onstatus:
+            return
+        stale = sum(1 for url in self.stale_urls if url in self.url_index)
+        offline = sum(1 for url in self.offline_urls if url in self.url_index)
+        parts = []
+        if stale:
+            parts.append(f"{stale} preview{'' if stale == 1 else 's'} "
+                         "shown from cache")
+        if offline:
+            parts.append(f"{offline} unavailable offline")
+        self.onstatus(", ".join(parts))
+
+    def tile_position(self, url):
+        """
+        Get the position of a url's preview in the grid.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            (tuple): The top left (x, y) of the preview.
+        """
+        index = self.url_index[url]
+        cell_width = self.preview_size[0] + 2 * self.TILE_PADDING
+        cell_height = self.preview_size[1] + 2 * self.TILE_PADDING
+        return ((index % self.num_columns) * cell_width + self.TILE_PADDING,
+                (index // self.num_columns) * cell_height + self.TILE_PADDING)
+
+    def url_at(self, x, y):
+        """
+        Find the url of the preview at a position in the grid.
+
+        Args:
+            x (float): The x position on the canvas.
+            y (float): The y position on the canvas.
+
+        Returns:
+            (string): The url at the position, or None if there is none.
+        """
+        cell_width = self.preview_size[0] + 2 * self.TILE_PADDING
+        cell_height = self.preview_size[1] + 2 * self.TILE_PADDING
+        column = int(x // cell_width)
+        index = int(y // cell_height) * self.num_columns + column
+        if x < 0 or y < 0 or column >= self.num_columns:
+            return None
+        if index >= len(self.url_order):
+            return None
+        return self.url_order[index]
+
+    def shutdown(self, event=None):
+        """
+        Cancel queued image fetches and scheduled callbacks when the
+        preview grid is destroyed, so nothing keeps the grid alive.
+
+        Args:
+            event (tk.Event): The destroy event.
+        """
+        if self.closed:
+            return
+        # Set first, so nothing can schedule the callbacks again
+        self.closed = True
+        self.load_generation += 1
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for after_id in (self.poll_id, self.resize_id, self.reconnect_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self.poll_id = None
+        self.resize_id = None
+        self.reconnect_id = None
+        self.root.unbind("<Configure>", self.configure_id)
+        with self.queue_lock:
+            self.fetch_queue = []
+            self.queued = {}
+            self.fetching_urls = set()
+        self.stale_urls = set()
+        self.offline_urls = set()
+        self.thumb_cache.flush()
+        self.failure_cache.flush()
+        # Free the Tk images now instead of when the grid is collected
+        self.renderer.clear()
+
+    @staticmethod
+    def resize_and_crop(img, size):
         """
         Resize and crop given image to fit the target size.
+        JPEGs are decoded at a reduced scale and animated images only
+        decode their first frame, the one an image is opened at. Palette
+        images are reduced before they are converted. The crop and resize
+        are done together in a single resampling pass.
 
         Args:
-            img (PIL.Image): The image to resize and crop.
+            img (PIL.Image): The image to resize and crop, not yet loaded.
             size (tuple): The target size (width, height).
 
         Returns:
             img (PIL.Image): The resized and cropped image.
         """
+        # Let the JPEG decoder skip detail the preview can't show,
+        # keeping the cropped area at least as large as the target size
+        if img.format == "JPEG":
+            scale = max(size[0] / img.width, size[1] / img.height)
+            img.draft("RGB", (int(img.width * scale) + 1,
+                              int(img.height * scale) + 1))
+
         # Calculate the images aspect ratio
         img_ratio = img.width / img.height
         target_ratio = size[0] / size[1]
 
-        if img_ratio > target_ratio:  # if wider
-            new_height = size[1]
-            new_width = int(new_height * img_ratio)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            left = (img.width - size[0]) / 2
-            right = left + size[0]
-            img = img.crop((left, 0, right, size[1]))
-        else:  # if taller
-            new_width = size[0]
-            new_height = int(new_width / img_ratio)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            top = (img.height - size[1]) / 2
-            bottom = top + size[1]
-            img = img.crop((0, top, size[0], bottom))
+        if img_ratio > target_ratio:  # if wider, crop the sides
+            crop_width = img.height * target_ratio
+            left = (img.width - crop_width) / 2
+            box = (left, 0, left + crop_width, img.height)
+        else:  # if taller, crop the top and bottom
+            crop_height = img.width / target_ratio
+            top = (img.height - crop_height) / 2
+            box = (0, top, img.width, top + crop_height)
 
-        return img
+        # Palette images must be converted for a smooth resample. Large
+        # ones are first reduced to 3x the target size in palette mode,
+        # like reducing_gap does, so the full size image isn't converted
+        if img.mode in ("P", "PA", "1"):
+            reduced = (size[0] * 3, size[1] * 3)
+            if box[2] - box[0] > reduced[0]:
+                img = img.resize(reduced, Image.Resampling.NEAREST, box=box)
+                box = None
+        if img.mode not in ("RGB", "RGBA"):
+            has_alpha = (img.mode in ("LA", "PA", "RGBa") or
+                         "transparency" in img.info)
+            img = img.convert("RGBA" if has_alpha else "RGB")
+
+        return img.resize(size, Image.Resampling.LANCZOS, box=box,
+                          reducing_gap=3.0)
 
     def clear_existing_images(self):
         """
         Clear the existing image previews from the grid.
         Ensures no image previews are duplicated when reloading images.
         """
-        for img_label in self.img_labels:
-            img_label.grid_forget()
-        self.img_labels = []
-        self.loaded_urls = set()
+        for url in self.renderer.shown_urls():
+            self.hide_tile(url)
+        self.url_index = {}
+        self.url_order = []
+        with self.queue_lock:
+            self.fetch_queue = []
+            self.queued = {}
+            self.fetching_urls = set()
+        self.failed = {}
+        self.offline_urls = set()
+        self.url_digests = {}
+        self.hash_urls = {}
+        self.badges = {}
         print("Cleared existing images")
 
+    def recheck_failed(self):
+        """
+        Forget the known-bad urls in the grid and fetch them again.
+        """
+        urls = list(self.url_order)
+        self.failure_cache.forget(urls)
+        for url in list(self.failed):
+            if url in self.renderer:
+                self.hide_tile(url)
+        self.failed = {}
+        self.offline_urls = set()
+        self.failure_cache.flush()
+        self.update_status()
+        print(f"Rechecking {len(urls)} preview urls")
+        self.refresh_viewport()
+
     def highlight_image(self, url):
         """
-        Highlight the image with the provided url in the grid.
+        Highlight the image with the provided url in the grid, fetching
+        it first if it isn't loaded yet.
 
         Args:
             url (string): The url of the image to highlight.
         """
-        for img_label in self.img_labels:
-            # Reset styling
-            img_label.config(borderwidth=0, highlightthickness=0)
-            # Highlight the currently selected image with a border
-            if hasattr(img_label, "url") and img_label.url == url:
-                img_label.config(highlightbackground="blue",
-                                 highlightthickness=4)
+        self.active_url = url
+        self.renderer.highlight(url)
+        self.refresh_viewport()
 
     def extract_image_urls(css_content, theme_format):
         """
@@ -214,17 +1223,46 @@ class ImagePreview:
 
     def on_resize(self, event):
         """
-        Update the number of columns based on current window width.
-        Adjusts the grid layout and scrollbar region accordingly.
+        Schedule a layout update after the window is resized.
+        Bursts of resize events while dragging the window edge are
+        coalesced into a single update once they settle.
 
         Args:
             event (tk.Event): The window resize event.
         """
-        for i, img_label in enumerate(self.img_labels):
-            img_label.grid(row=i // self.get_num_columns(),
-                           column=i % self.get_num_columns(),
-                           padx=5, pady=5, sticky="nsew")
-        self.update_scrollregion()
+        if self.resize_id is not None:
+            self.root.after_cancel(self.resize_id)
+        self.resize_id = self.root.after(self.RESIZE_DELAY, self.apply_resize)
+
+    def apply_resize(self):
+        """
+        Update the number of columns based on current window width.
+        Previews are only moved if the number of columns changed,
+        otherwise only rows that came into view are filled in.
+        """
+        self.resize_id = None
+        start = time.perf_counter()
+        num_columns = self.get_num_columns()
+        if num_columns == self.num_columns:
+            self.refresh_viewport()
+            return
+
+        self.num_columns = num_columns
+        self.update_content_size()
+        self.refresh_viewport(relayout=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Relayout to {num_columns} columns took {elapsed:.1f} ms")
+
+    def update_content_size(self):
+        """
+        Size the scrollable area to fit every grid position, including
+        the ones without a drawn preview.
+        """
+        cell_width = self.preview_size[0] + 2 * self.TILE_PADDING
+        cell_height = self.preview_size[1] + 2 * self.TILE_PADDING
+        rows = -(-len(self.url_index) // self.num_columns)  # ceil
+        self.renderer.resize_content(self.num_columns * cell_width,
+                                     max(1, rows * cell_height))
 
     def get_num_columns(self):
         """
@@ -243,11 +1281,17 @@ class ImagePreview:
         num_columns = max(1, avail_width // img_width)
         return num_columns
 
-    def update_scrollregion(self, event=None):
+    def on_scroll(self, first, last):
         """
-        Updates the scroll region of the canvas to fit the content.
+        Update the scrollbar and the previews in view when the
+        canvas view changes.
+
+        Args:
+            first (string): The top of the view as a fraction.
+            last (string): The bottom of the view as a fraction.
         """
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.scrollbar.set(first, last)
+        self.refresh_viewport()
 
     def on_mouse_wheel(self, event):
         """
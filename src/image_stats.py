@@ -0,0 +1,231 @@
+import os
+import json
+import colorsys
+import threading
+from setup import Setup
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only needed for this feature
+    np = None
+
+
+class ImageStatsIndex:
+    """
+    A persistent index of backdrop image statistics: mean luminance,
+    dominant colour and native dimensions. Statistics are computed from
+    cached preview thumbnails in NumPy batches, so the preview grid can
+    sort and filter by them without fetching anything again.
+    """
+    FILE_NAME = "stats.json"
+    COLOR_LEVELS = 4  # Levels per channel when finding the dominant colour
+    DARK_LUMINANCE = 0.35  # Backdrops below are dark
+    LIGHT_LUMINANCE = 0.6  # Backdrops above are light
+
+    _shared = None
+
+    def __init__(self, cache_dir=None):
+        """
+        Initialize the ImageStatsIndex and load it from disk.
+
+        Args:
+            cache_dir (string): The directory to store the index in.
+        """
+        cache_dir = cache_dir or Setup.app_data_dir("thumbnails")
+        self.path = os.path.join(cache_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries = self.read()
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the index instance shared by the whole program.
+
+        Returns:
+            (ImageStatsIndex): The shared index.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def available():
+        """
+        Check if the optional numpy dependency is installed.
+
+        Returns:
+            (boolean): True if statistics can be computed.
+        """
+        return np is not None
+
+    def read(self):
+        """
+        Read the index from disk.
+
+        Returns:
+            (dict): The statistics by url.
+        """
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, url):
+        """
+        Get the statistics of a url.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            (dict): The luminance (0-1), color (#rrggbb), width and height
+                    of the image, or None if not indexed yet.
+        """
+        with self.lock:
+            return self.entries.get(url)
+
+    def missing(self, urls):
+        """
+        Get the urls that haven't been indexed yet.
+
+        Args:
+            urls (list): The urls to check.
+
+        Returns:
+            (list): The urls without statistics.
+        """
+        with self.lock:
+            return [url for url in urls if url not in self.entries]
+
+    def add(self, urls, images, native_sizes):
+        """
+        Compute and store the statistics of a batch of thumbnails.
+
+        Args:
+            urls (list): The urls of the images.
+            images (list): The thumbnail (PIL.Image) of each url, all of
+                           the same size.
+            native_sizes (list): The full (width, height) of each image,
+                                 or None if unknown.
+        """
+        if not urls:
+            return
+        pixels = np.stack([np.asarray(img.convert("RGB"))
+                           for img in images]).astype(np.float32) / 255
+        pixels = pixels.reshape(len(images), -1, 3)
+
+        # Rec. 709 luma averaged over each image
+        luminance = pixels @ np.array([0.2126, 0.7152, 0.0722],
+                                      dtype=np.float32)
+        mean_luminance = luminance.mean(axis=1)
+
+        # Most common colour after reducing each channel to a few levels
+        levels = self.COLOR_LEVELS
+        quantized = np.minimum((pixels * levels).astype(np.intp), levels - 1)
+        bins = (quantized[:, :, 0] * levels + quantized[:, :, 1]) * levels
+        bins += quantized[:, :, 2]
+        bin_count = levels ** 3
+        bins += np.arange(len(images))[:, None] * bin_count
+        counts = np.bincount(bins.ravel(), minlength=len(images) * bin_count)
+        dominant = counts.reshape(len(images), bin_count).argmax(axis=1)
+
+        with self.lock:
+            for url, lum, color, native in zip(urls, mean_luminance.tolist(),
+                                               dominant.tolist(),
+                                               native_sizes):
+                self.entries[url] = {
+                    "luminance": round(lum, 4),
+                    "color": self.bin_color(color),
+                    "width": native[0] if native else None,
+                    "height": native[1] if native else None,
+                }
+            self.dirty = True
+
+    def sort_key(self, order):
+        """
+        Get a sort key ordering urls by their statistics.
+        Urls without statistics yet are sorted last.
+
+        Args:
+            order (string): "file", "dark", "light", "size" or "color".
+
+        Returns:
+            (function): The sort key (url), or None for the file order.
+        """
+        if order == "file":
+            return None
+
+        def key(url):
+            entry = self.get(url)
+            if entry is None:
+                return (1, 0)
+            if order == "dark":
+                value = entry["luminance"]
+            elif order == "light":
+                value = -entry["luminance"]
+            elif order == "size":
+                value = -(entry["width"] or 0) * (entry["height"] or 0)
+            else:
+                rgb = bytes.fromhex(entry["color"][1:])
+                value = colorsys.rgb_to_hsv(*(c / 255 for c in rgb))[0]
+            return (0, value)
+        return key
+
+    def filter(self, name):
+        """
+        Get a filter for urls by their statistics.
+        Urls without statistics yet are always kept.
+
+        Args:
+            name (string): "all", "dark", "light" or "hd" (1920x1080+).
+
+        Returns:
+            (function): Returns if a url is kept (url), or None for all.
+        """
+        if name == "all":
+            return None
+
+        def keep(url):
+            entry = self.get(url)
+            if entry is None:
+                return True
+            if name == "dark":
+                return entry["luminance"] < self.DARK_LUMINANCE
+            if name == "light":
+                return entry["luminance"] > self.LIGHT_LUMINANCE
+            return ((entry["width"] or 0) >= 1920 and
+                    (entry["height"] or 0) >= 1080)
+        return keep
+
+    def bin_color(self, index):
+        """
+        Get the centre colour of a quantized colour bin.
+
+        Args:
+            index (int): The colour bin.
+
+        Returns:
+            (string): The colour as #rrggbb.
+        """
+        levels = self.COLOR_LEVELS
+        channels = (index // (levels * levels), index // levels % levels,
+                    index % levels)
+        return "#" + "".join(f"{int((c + 0.5) * 255 / levels):02x}"
+                             for c in channels)
+
+    def flush(self):
+        """
+        Write the index to disk if it has changed.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.entries)
+            self.dirty = False
+        try:
+            with open(self.path, "w") as file:
+                file.write(data)
+        except OSError as e:
+            print(f"Failed to save image statistics: {e}")
@@ -2,6 +2,7 @@ from themes.dscplus import DSCPlusGUI
 from themes.softx import SoftXGUI
 from themes.clearvis import ClearVisGUI
 import tkinter as tk
+import multiprocessing
 
 
 class GUISelector:
@@ -95,4 +96,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Lets the frozen exe start image decode processes
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,217 @@
+import itertools
+import tkinter as tk
+from PIL import Image, ImageTk
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only needed for this feature
+    np = None
+
+
+class NearDuplicateFinder:
+    """
+    Finds clusters of near-identical backdrops, such as different crops or
+    compressions of one wallpaper, from their preview thumbnails.
+    Thumbnails are reduced to 64-bit difference hashes (dHash) in one
+    NumPy batch. Close hashes are found with a multi-index: the hashes are
+    split into bands, and two hashes within MAX_DISTANCE bits must have a
+    band within MAX_DISTANCE // BANDS bits of each other. Only hashes
+    matching on a band are compared instead of every pair.
+    """
+    HASH_WIDTH = 9  # Columns compared pairwise into 8 bits per row
+    HASH_HEIGHT = 8
+    BANDS = 4  # 16-bit bands
+    MAX_DISTANCE = 6  # Max differing bits for a near-duplicate
+
+    @staticmethod
+    def available():
+        """
+        Check if the optional numpy dependency is installed.
+
+        Returns:
+            (boolean): True if near-duplicates can be found.
+        """
+        return np is not None
+
+    def hashes(self, images):
+        """
+        Compute the difference hashes of a batch of images.
+
+        Args:
+            images (list): The thumbnails (PIL.Image) to hash.
+
+        Returns:
+            (numpy.ndarray): The 64-bit hash of each image.
+        """
+        size = (self.HASH_WIDTH, self.HASH_HEIGHT)
+        pixels = np.stack([
+            np.asarray(img.convert("L").resize(size, Image.Resampling.BOX))
+            for img in images]).astype(np.int16)
+        # Each bit is whether a pixel is brighter than its right neighbour
+        bits = (pixels[:, :, 1:] > pixels[:, :, :-1]).reshape(len(images), -1)
+        return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+    @staticmethod
+    def distances(left, right):
+        """
+        Count the differing bits between pairs of hashes.
+
+        Args:
+            left (numpy.ndarray): The first hash of each pair.
+            right (numpy.ndarray): The second hash of each pair.
+
+        Returns:
+            (numpy.ndarray): The Hamming distance of each pair.
+        """
+        diff = np.bitwise_xor(left, right)
+        if hasattr(np, "bitwise_count"):  # numpy 2.0+
+            return np.bitwise_count(diff)
+        return np.unpackbits(diff.view(np.uint8).reshape(-1, 8),
+                             axis=1).sum(axis=1)
+
+    def candidate_pairs(self, hashes):
+        """
+        Find the pairs of hashes with at least one band within
+        MAX_DISTANCE // BANDS bits of each other.
+
+        Args:
+            hashes (numpy.ndarray): The 64-bit hash of each image.
+
+        Returns:
+            (numpy.ndarray): The (n, 2) indices of the candidate pairs.
+        """
+        band_bits = 64 // self.BANDS
+        radius = self.MAX_DISTANCE // self.BANDS
+        band_mask = np.uint64((1 << band_bits) - 1)
+        # Bit flips to probe each band value with, up to the radius
+        flips = np.array([sum(1 << bit for bit in bits)
+                          for count in range(radius + 1)
+                          for bits in itertools.combinations(
+                              range(band_bits), count)], dtype=np.intp)
+
+        count = len(hashes)
+        keys = []
+        for band in range(self.BANDS):
+            values = (hashes >> np.uint64(band * band_bits)) & band_mask
+            values = values.astype(np.intp)
+            order = np.argsort(values, kind="stable")
+            # Start and size of the run of each band value in the order,
+            # looked up directly since bands are only 16 bits
+            run_sizes = np.bincount(values, minlength=1 << band_bits)
+            run_starts = np.cumsum(run_sizes) - run_sizes
+
+            probes = (values[:, None] ^ flips[None, :]).ravel()
+            starts = run_starts[probes]
+            sizes = run_sizes[probes]
+            firsts = np.repeat(np.arange(count).repeat(len(flips)), sizes)
+            run_offsets = np.cumsum(sizes) - sizes
+            positions = (np.repeat(starts - run_offsets, sizes) +
+                         np.arange(sizes.sum()))
+            seconds = order[positions]
+
+            keep = firsts < seconds
+            keys.append(firsts[keep] * count + seconds[keep])
+
+        keys = np.unique(np.concatenate(keys))
+        return np.stack([keys // count, keys % count], axis=1)
+
+    def clusters(self, urls, images):
+        """
+        Group urls whose thumbnails are near-duplicates.
+
+        Args:
+            urls (list): The urls of the images.
+            images (list): The thumbnail (PIL.Image) of each url.
+
+        Returns:
+            (list): Lists of near-duplicate urls, in the given order.
+        """
+        if len(urls) < 2:
+            return []
+        hashes = self.hashes(images)
+        pairs = self.candidate_pairs(hashes)
+        distances = self.distances(hashes[pairs[:, 0]], hashes[pairs[:, 1]])
+        close = pairs[distances <= self.MAX_DISTANCE]
+
+        # Join the close pairs into clusters
+        parents = list(range(len(urls)))
+
+        def root(index):
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        for first, second in close.tolist():
+            parents[root(second)] = root(first)
+
+        groups = {}
+        for index, url in enumerate(urls):
+            groups.setdefault(root(index), []).append(url)
+        return [group for group in groups.values() if len(group) > 1]
+
+
+class NearDuplicateWindow:
+    """
+    A window listing clusters of near-duplicate backdrops, with buttons to
+    select or delete each backdrop.
+    """
+    def __init__(self, root, clusters, thumbnails, onselect, ondelete):
+        """
+        Initialize the NearDuplicateWindow.
+
+        Args:
+            root (tk.Tk): The root Tkinter window.
+            clusters (list): Lists of near-duplicate urls.
+            thumbnails (dict): The thumbnail (PIL.Image) of each url.
+            onselect (function): Function called to select a url (url).
+            ondelete (function): Function called to delete a url (url).
+        """
+        self.window = tk.Toplevel(root)
+        self.window.title("Near-Duplicate Backdrops")
+        self.window.geometry("700x450")
+        self.images = []  # Keep references so Tk doesn't free them
+
+        canvas = tk.Canvas(self.window)
+        scrollbar = tk.Scrollbar(self.window, orient="vertical",
+                                 command=canvas.yview)
+        frame = tk.Frame(canvas)
+        frame.bind("<Configure>", lambda e: canvas.configure(
+            scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        if not clusters:
+            tk.Label(frame, text="No near-duplicate backdrops found.",
+                     font=("Arial", 10)).pack(padx=10, pady=10)
+
+        for number, urls in enumerate(clusters, start=1):
+            tk.Label(frame, text=f"Group {number} ({len(urls)} backdrops)",
+                     font=("Arial", 10, "bold")).pack(anchor="w", padx=10,
+                                                      pady=(10, 0))
+            for url in urls:
+                self.add_row(frame, url, thumbnails[url], onselect, ondelete)
+
+    def add_row(self, frame, url, img, onselect, ondelete):
+        """
+        Add a backdrop with its thumbnail and buttons to the window.
+
+        Args:
+            frame (tk.Frame): The frame listing the clusters.
+            url (string): The url of the backdrop.
+            img (PIL.Image): The thumbnail of the backdrop.
+            onselect (function): Function called to select the url (url).
+            ondelete (function): Function called to delete the url (url).
+        """
+        row = tk.Frame(frame)
+        row.pack(fill="x", padx=10, pady=2)
+        tk_img = ImageTk.PhotoImage(img)
+        self.images.append(tk_img)
+        tk.Label(row, image=tk_img).pack(side="left")
+        tk.Button(row, text="Select",
+                  command=lambda: onselect(url)).pack(side="left", padx=5)
+        tk.Button(row, text="Delete",
+                  command=lambda: ondelete(url)).pack(side="left")
+        tk.Label(row, text=url, font=("Arial", 9)).pack(side="left", padx=5)
@@ -0,0 +1,370 @@
+import tkinter as tk
+from tkinter import ttk
+from PIL import ImageTk
+
+
+class PhotoImagePool:
+    """
+    A bounded pool of Tkinter PhotoImages. Released images are pasted over
+    with the next thumbnail of the same size and mode instead of creating
+    a new Tk image for every preview shown.
+    """
+    MAX_FREE = 64  # Released images kept for reuse
+
+    def __init__(self, max_free=None):
+        """
+        Initialize the PhotoImagePool.
+
+        Args:
+            max_free (int): The max released images kept for reuse.
+        """
+        self.max_free = max_free or self.MAX_FREE
+        self.free = {}  # Released images by (mode, size)
+        self.free_count = 0
+
+    def acquire(self, img):
+        """
+        Get a PhotoImage showing a thumbnail, reusing a released one
+        of the same size and mode when available.
+
+        Args:
+            img (PIL.Image): The thumbnail to show.
+
+        Returns:
+            (ImageTk.PhotoImage): The Tkinter image.
+        """
+        key = (img.mode, img.size)
+        photos = self.free.get(key)
+        if photos:
+            self.free_count -= 1
+            tk_img = photos.pop()
+            tk_img.paste(img)
+            return tk_img
+
+        tk_img = self.create(img)
+        tk_img.pool_key = key
+        return tk_img
+
+    def create(self, img):
+        """
+        Create a new PhotoImage for a thumbnail.
+
+        Args:
+            img (PIL.Image): The thumbnail to show.
+
+        Returns:
+            (ImageTk.PhotoImage): The Tkinter image.
+        """
+        # Convert the the PIL image to Tkinter
+        return ImageTk.PhotoImage(img)
+
+    def release(self, tk_img):
+        """
+        Return a PhotoImage to the pool, or let it be freed if full.
+
+        Args:
+            tk_img (ImageTk.PhotoImage): The Tkinter image to release.
+        """
+        if self.free_count < self.max_free:
+            self.free.setdefault(tk_img.pool_key, []).append(tk_img)
+            self.free_count += 1
+
+    def clear(self):
+        """
+        Drop every released image so their Tk images are freed.
+        """
+        self.free = {}
+        self.free_count = 0
+
+
+class LabelRenderer:
+    """
+    Draws each preview as its own Tkinter label inside a frame on the
+    preview canvas. Hidden labels and their images are reused from
+    bounded pools.
+    """
+    MAX_FREE_TILES = 64  # Hidden labels kept for reuse
+
+    def __init__(self, preview):
+        """
+        Initialize the LabelRenderer and the frame holding the labels.
+
+        Args:
+            preview (ImagePreview): The preview grid to draw for.
+        """
+        self.preview = preview
+        self.tiles = {}  # Preview labels by url
+        self.free_tiles = []  # Hidden preview labels ready for reuse
+        self.photos = PhotoImagePool()
+        self.highlighted_url = None
+
+        self.scrollable_frame = ttk.Frame(preview.canvas)
+        preview.canvas.create_window((0, 0), window=self.scrollable_frame,
+                                     anchor="nw")
+
+    def __contains__(self, url):
+        return url in self.tiles
+
+    def shown_urls(self):
+        """
+        Get the urls that currently have a preview drawn.
+
+        Returns:
+            (list): The drawn urls.
+        """
+        return list(self.tiles)
+
+    def show(self, url, img, position):
+        """
+        Draw an image at a position, reusing a hidden label when available.
+
+        Args:
+            url (string): The url of the image.
+            img (PIL.Image): The thumbnail to draw.
+            position (tuple): The top left (x, y) of the preview.
+        """
+        if self.free_tiles:
+            img_label = self.free_tiles.pop()
+        else:
+            img_label = tk.Label(self.scrollable_frame, borderwidth=0,
+                                 highlightthickness=0)
+            # Clickable previews
+            if self.preview.onclick:
+                img_label.bind("<Button-1>", lambda e, label=img_label:
+                               self.preview.onclick(label.url))
+
+        tk_img = self.photos.acquire(img)
+        img_label.config(image=tk_img)
+        img_label.img = tk_img
+        img_label.url = url
+        self.tiles[url] = img_label
+        self.style(img_label)
+        self.move(url, position)
+
+    def move(self, url, position):
+        """
+        Move a drawn preview to a new position.
+
+        Args:
+            url (string): The url of the image.
+            position (tuple): The top left (x, y) of the preview.
+        """
+        self.tiles[url].place(x=position[0], y=position[1])
+
+    def hide(self, url):
+        """
+        Hide the preview of a url and keep its label for reuse.
+
+        Args:
+            url (string): The url of the image.
+        """
+        img_label = self.tiles.pop(url)
+        img_label.config(image="")
+        self.photos.release(img_label.img)
+        img_label.img = None
+        if len(self.free_tiles) < self.MAX_FREE_TILES:
+            img_label.place_forget()
+            self.free_tiles.append(img_label)
+        else:
+            img_label.destroy()
+
+    def highlight(self, url):
+        """
+        Highlight the preview with the provided url.
+
+        Args:
+            url (string): The url of the image to highlight.
+        """
+        previous = self.tiles.get(self.highlighted_url)
+        self.highlighted_url = url
+        if previous is not None:
+            self.style(previous)
+        if url in self.tiles:
+            self.style(self.tiles[url])
+
+    def style(self, img_label):
+        """
+        Apply the highlight border to a preview if it is the selected image.
+
+        Args:
+            img_label (tk.Label): The preview label to style.
+        """
+        # Reset styling
+        img_label.config(borderwidth=0, highlightthickness=0)
+        # Highlight the currently selected image with a border
+        if img_label.url == self.highlighted_url:
+            img_label.config(highlightbackground="blue",
+                             highlightthickness=4)
+
+    def clear(self):
+        """
+        Drop every drawn and pooled image so their Tk images are freed.
+        Used once the preview canvas has been destroyed.
+        """
+        self.tiles = {}
+        self.free_tiles = []
+        self.photos.clear()
+
+    def resize_content(self, width, height):
+        """
+        Size the scrollable area to fit every grid position.
+
+        Args:
+            width (int): The width of the full grid.
+            height (int): The height of the full grid.
+        """
+        self.scrollable_frame.config(width=width, height=height)
+        self.preview.canvas.configure(scrollregion=(0, 0, width, height))
+
+
+class CanvasRenderer:
+    """
+    Draws every preview as an image item directly on the preview canvas.
+    Clicks are hit-tested by one canvas binding and the selection is a
+    single rectangle item, so highlighting doesn't touch other previews.
+    Hidden items and their images are reused from bounded pools.
+    """
+    HIGHLIGHT_WIDTH = 4
+    MAX_FREE_ITEMS = 64  # Hidden image items kept for reuse
+
+    def __init__(self, preview):
+        """
+        Initialize the CanvasRenderer and its highlight rectangle.
+
+        Args:
+            preview (ImagePreview): The preview grid to draw for.
+        """
+        self.preview = preview
+        self.canvas = preview.canvas
+        self.items = {}  # Canvas image item ids by url
+        self.images = {}  # PhotoImages of the drawn items by url
+        self.free_items = []  # Hidden image items ready for reuse
+        self.photos = PhotoImagePool()
+        self.highlighted_url = None
+
+        self.highlight_item = self.canvas.create_rectangle(
+            0, 0, 0, 0, outline="blue", width=self.HIGHLIGHT_WIDTH,
+            state="hidden")
+        self.canvas.bind("<Button-1>", self.on_click)
+
+    def __contains__(self, url):
+        return url in self.items
+
+    def shown_urls(self):
+        """
+        Get the urls that currently have a preview drawn.
+
+        Returns:
+            (list): The drawn urls.
+        """
+        return list(self.items)
+
+    def show(self, url, img, position):
+        """
+        Draw an image at a position, reusing a hidden item when available.
+
+        Args:
+            url (string): The url of the image.
+            img (PIL.Image): The thumbnail to draw.
+            position (tuple): The top left (x, y) of the preview.
+        """
+        tk_img = self.photos.acquire(img)
+        if self.free_items:
+            item = self.free_items.pop()
+            self.canvas.itemconfig(item, image=tk_img, state="normal")
+        else:
+            item = self.canvas.create_image(0, 0, image=tk_img, anchor="nw")
+            self.canvas.tag_lower(item, self.highlight_item)
+        self.items[url] = item
+        self.images[url] = tk_img
+        self.move(url, position)
+
+    def move(self, url, position):
+        """
+        Move a drawn preview to a new position.
+
+        Args:
+            url (string): The url of the image.
+            position (tuple): The top left (x, y) of the preview.
+        """
+        self.canvas.coords(self.items[url], position[0], position[1])
+        if url == self.highlighted_url:
+            self.draw_highlight(position)
+
+    def hide(self, url):
+        """
+        Hide the preview of a url and keep its item for reuse.
+
+        Args:
+            url (string): The url of the image.
+        """
+        item = self.items.pop(url)
+        self.canvas.itemconfig(item, image="")
+        self.photos.release(self.images.pop(url))
+        if len(self.free_items) < self.MAX_FREE_ITEMS:
+            self.canvas.itemconfig(item, state="hidden")
+            self.free_items.append(item)
+        else:
+            self.canvas.delete(item)
+        if url == self.highlighted_url:
+            self.canvas.itemconfig(self.highlight_item, state="hidden")
+
+    def highlight(self, url):
+        """
+        Move the highlight rectangle to the preview with the provided url.
+
+        Args:
+            url (string): The url of the image to highlight.
+        """
+        self.highlighted_url = url
+        if url in self.items:
+            self.draw_highlight(self.canvas.coords(self.items[url]))
+        else:
+            self.canvas.itemconfig(self.highlight_item, state="hidden")
+
+    def draw_highlight(self, position):
+        """
+        Draw the highlight rectangle around a preview position.
+
+        Args:
+            position (tuple): The top left (x, y) of the preview.
+        """
+        width, height = self.preview.preview_size
+        offset = self.HIGHLIGHT_WIDTH / 2
+        self.canvas.coords(self.highlight_item,
+                           position[0] - offset, position[1] - offset,
+                           position[0] + width + offset,
+                           position[1] + height + offset)
+        self.canvas.itemconfig(self.highlight_item, state="normal")
+
+    def on_click(self, event):
+        """
+        Find the clicked preview from the click position.
+
+        Args:
+            event (tk.Event): The mouse click event.
+        """
+        url = self.preview.url_at(self.canvas.canvasx(event.x),
+                                  self.canvas.canvasy(event.y))
+        if url in self.items and self.preview.onclick:
+            self.preview.onclick(url)
+
+    def clear(self):
+        """
+        Drop every drawn and pooled image so their Tk images are freed.
+        Used once the preview canvas has been destroyed.
+        """
+        self.items = {}
+        self.images = {}
+        self.free_items = []
+        self.photos.clear()
+
+    def resize_content(self, width, height):
+        """
+        Size the scrollable area to fit every grid position.
+
+        Args:
+            width (int): The width of the full grid.
+            height (int): The height of the full grid.
+        """
+        self.canvas.configure(scrollregion=(0, 0, width, height))
@@ -0,0 +1,150 @@
+import os
+import re
+import sys
+import time
+import tempfile
+import tracemalloc
+
+# Allow importing the program modules from src/
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+from backdrop_manager import BackdropManager  # noqa: E402
+from file_writer import FileWriter  # noqa: E402
+
+PROP = "--dplus-backdrop"
+FILE_SIZES = (10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+BACKDROPS_PER_KB = 0.5  # Backdrop lines among the other rules
+ROUNDS = 5
+
+
+def make_theme(size):
+    """
+    Create theme CSS of about the given size, with commented out
+    backdrop lines spread among other rules.
+
+    Args:
+        size (int): The size of the theme in bytes.
+
+    Returns:
+        (tuple): The CSS text and its backdrop urls.
+    """
+    rule = ".chat-{0} {{ color: var(--text-{0}); margin: 0 {0}px; }}\n"
+    backdrops = max(2, int(size / 1024 * BACKDROPS_PER_KB))
+    urls = [f"https://example.invalid/backdrop_{i}.png"
+            for i in range(backdrops)]
+    interval = max(1, size // len(rule.format(0)) // backdrops)
+    lines = [".theme-dark {\n"]
+    length = 0
+    i = 0
+    while length < size:
+        if i % interval == 0:
+            url = urls[i // interval % backdrops]
+            line = f"  /*{PROP}: url({url});*/\n"
+        else:
+            line = rule.format(i)
+        lines.append(line)
+        length += len(line)
+        i += 1
+    lines.append("}\n")
+    return "".join(lines), urls
+
+
+def legacy_update(css_file_path, active_backdrop, bg_str):
+    """
+    The previous activation, for reference: compiles the pattern, reads
+    the file and splices every matched line into a list of characters.
+
+    Args:
+        css_file_path (string): The path to the CSS file.
+        active_backdrop (string): The selected backdrop URL.
+        bg_str (string): The theme's backdrop property.
+    """
+    with open(css_file_path, "r") as file:
+        content = file.read()
+    pattern = re.compile(
+        r'(?P<full_line>(?P<indent>\s*)(?P<comment>/\*)?'
+        r'(?P<prop>{}:\s*url\([\'"]?(?P<url>.*?)[\'"]?\)\s*;)'
+        r'(?P<end_comment>\*/)?(?P<trailing>.*))'.format(re.escape(bg_str)),
+        re.MULTILINE)
+    new_lines = []
+    for match in pattern.finditer(content):
+        groups = match.groupdict()
+        if groups['url'].strip('\'"') == active_backdrop:
+            new_line = (f"{groups['indent']}{groups['prop']}"
+                        f"{groups['trailing']}")
+        else:
+            new_line = (f"{groups['indent']}/*{groups['prop']}*/"
+                        f"{groups['trailing']}")
+        new_lines.append((match.start(), match.end(), new_line))
+    if new_lines:
+        content_list = list(content)
+        for start, end, replace in reversed(new_lines):
+            content_list[start:end] = replace
+        new_content = "".join(content_list)
+        if new_content != content:
+            with open(css_file_path, "w") as file:
+                file.write(new_content)
+
+
+def measure(activate, urls):
+    """
+    Measure the average time and peak allocation of activations, each
+    selecting a different backdrop.
+
+    Args:
+        activate (function): Activates a backdrop (url).
+        urls (list): The backdrop urls to select in turn.
+
+    Returns:
+        (tuple): The average time in ms and the peak allocation in KB.
+    """
+    activate(urls[0])  # warm up
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        activate(urls[(i + 1) % len(urls)])
+    elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+
+    tracemalloc.start()
+    activate(urls[(ROUNDS + 1) % len(urls)])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    """
+    Compare the previous and the offset-based activation on theme files
+    from 10 KB to 10 MB, checking both write the same file.
+    """
+    print(f"{'file KB':<10}{'legacy ms':>11}{'legacy KB':>12}"
+          f"{'offset ms':>11}{'offset KB':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in FILE_SIZES:
+            text, urls = make_theme(size)
+            legacy_path = os.path.join(temp_dir, "legacy.theme.css")
+            offset_path = os.path.join(temp_dir, "offset.theme.css")
+            for path in (legacy_path, offset_path):
+                with open(path, "w") as file:
+                    file.write(text)
+
+            legacy = measure(
+                lambda url: legacy_update(legacy_path, url, PROP), urls)
+            manager = BackdropManager(offset_path, PROP)
+            manager.get_index()
+            writer = FileWriter.shared()
+
+            def activate(url):
+                manager.update_css_file(url, PROP)
+                writer.flush()  # Include the background write
+            offset = measure(activate, urls)
+            print(f"{size // 1024:<10}{legacy[0]:>11.1f}{legacy[1]:>12.0f}"
+                  f"{offset[0]:>11.1f}{offset[1]:>12.0f}")
+
+            with open(legacy_path) as legacy_file:
+                with open(offset_path) as offset_file:
+                    if legacy_file.read() != offset_file.read():
+                        print("  Mismatch: the files differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow importing the program modules from src/
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from image_preview import ImagePreview  # noqa: E402
+from bench_thumbnails import make_sample  # noqa: E402
+
+NUM_IMAGES = 24  # Half 4K JPEGs, half 4K PNGs, like a cold load
+
+
+def cold_load(preview, samples):
+    """
+    Decode every sample into thumbnails with the preview grid's download
+    threads, as a cold load of uncached backdrops does.
+
+    Args:
+        preview (ImagePreview): The preview to decode with.
+        samples (list): The encoded images.
+
+    Returns:
+        (float): The wall time in ms.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=ImagePreview.MAX_WORKERS) as pool:
+        list(pool.map(preview.decode, samples))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """
+    Compare the cold load time of decoding in the download threads with
+    decode process pools of 1 process up to one per core.
+    """
+    jpeg, png = make_sample("JPEG"), make_sample("PNG")
+    samples = [jpeg if i % 2 else png for i in range(NUM_IMAGES)]
+    # Only the class level decode settings are used, no window is needed
+    preview = ImagePreview.__new__(ImagePreview)
+    cores = os.cpu_count() or 1
+    counts = [0] + [n for n in (1, 2, 4, 8, 16, 32) if n < cores] + [cores]
+
+    print(f"{NUM_IMAGES} images, {cores} cores")
+    print(f"{'processes':<12}{'ms':>10}{'speedup':>10}")
+    baseline = None
+    for processes in counts:
+        os.environ[ImagePreview.DECODE_PROCESSES_VAR] = str(processes)
+        ImagePreview._decode_pool = None
+        cold_load(preview, samples[:2])  # warm up, start the processes
+        elapsed = cold_load(preview, samples)
+        if ImagePreview._decode_pool:
+            ImagePreview._decode_pool.shutdown()
+        baseline = baseline or elapsed
+        label = "threads" if processes == 0 else str(processes)
+        print(f"{label:<12}{elapsed:>10.0f}{baseline / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import numpy as np
+
+# Allow importing the program modules from src/
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+from near_duplicates import NearDuplicateFinder  # noqa: E402
+
+LIBRARY_SIZES = (500, 2000, 8000, 32000)
+NEAR_DUPLICATES = 0.1  # Share of hashes that get a near-duplicate
+
+
+def make_hashes(count, rng):
+    """
+    Create random 64-bit hashes with planted near-duplicates.
+
+    Args:
+        count (int): The number of hashes.
+        rng (numpy.random.Generator): The random number generator.
+
+    Returns:
+        (numpy.ndarray): The hashes.
+    """
+    hashes = rng.integers(0, 2 ** 63, count, dtype=np.uint64)
+    planted = rng.choice(count, int(count * NEAR_DUPLICATES), replace=False)
+    for index in planted:
+        bits = rng.choice(64, rng.integers(1, 5), replace=False)
+        flips = np.uint64(sum(1 << int(bit) for bit in bits))
+        hashes[(index + 1) % count] = hashes[index] ^ flips
+    return hashes
+
+
+def all_pairs(finder, hashes):
+    """
+    Compare every pair of hashes, for reference.
+
+    Args:
+        finder (NearDuplicateFinder): The finder with the distance limit.
+        hashes (numpy.ndarray): The hashes.
+
+    Returns:
+        (int): The number of near-duplicate pairs.
+    """
+    found = 0
+    for index in range(len(hashes) - 1):
+        distances = finder.distances(hashes[index + 1:],
+                                     np.full(len(hashes) - index - 1,
+                                             hashes[index]))
+        found += int(np.count_nonzero(distances <= finder.MAX_DISTANCE))
+    return found
+
+
+def banded(finder, hashes):
+    """
+    Compare only the hashes that share a band.
+
+    Args:
+        finder (NearDuplicateFinder): The finder with the distance limit.
+        hashes (numpy.ndarray): The hashes.
+
+    Returns:
+        (tuple): The number of near-duplicate pairs and candidate pairs.
+    """
+    pairs = finder.candidate_pairs(hashes)
+    distances = finder.distances(hashes[pairs[:, 0]], hashes[pairs[:, 1]])
+    return int(np.count_nonzero(distances <= finder.MAX_DISTANCE)), len(pairs)
+
+
+def main():
+    """
+    Compare the banded index with all-pairs comparison on hash libraries
+    of increasing size, checking both find the same pairs.
+    """
+    finder = NearDuplicateFinder()
+    rng = np.random.default_rng(1)
+    print(f"{'hashes':<8}{'all-pairs ms':>14}{'banded ms':>12}"
+          f"{'candidates':>12}{'found':>8}")
+    for count in LIBRARY_SIZES:
+        hashes = make_hashes(count, rng)
+        start = time.perf_counter()
+        expected = all_pairs(finder, hashes)
+        all_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        found, candidates = banded(finder, hashes)
+        banded_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:<8}{all_ms:>14.1f}{banded_ms:>12.1f}"
+              f"{candidates:>12}{found:>8}")
+        if found != expected:
+            print(f"  Mismatch: all-pairs found {expected} pairs")
+
+
+if __name__ == "__main__":
+    main()
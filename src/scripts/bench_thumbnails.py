@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+# Allow importing the program modules from src/
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+from image_preview import ImagePreview  # noqa: E402
+
+PREVIEW_SIZE = (125, 100)
+ROUNDS = 5
+
+
+def make_sample(fmt, size=(3840, 2160), frames=1):
+    """
+    Create an encoded sample image to benchmark decoding with.
+
+    Args:
+        fmt (string): The Pillow format name to encode with.
+        size (tuple): The image size (width, height).
+        frames (int): The number of frames for animated formats.
+
+    Returns:
+        (bytes): The encoded image.
+    """
+    images = []
+    for i in range(frames):
+        # Gradient with noise so the encoders can't compress it away
+        img = Image.linear_gradient("L").resize(size).convert("RGB")
+        noise = Image.effect_noise(size, 40 + i).convert("RGB")
+        images.append(Image.blend(img, noise, 0.3))
+
+    buffer = BytesIO()
+    if frames > 1:
+        images[0].save(buffer, fmt, save_all=True,
+                       append_images=images[1:])
+    else:
+        images[0].save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def legacy_thumbnail(data, size):
+    """
+    The previous thumbnail path: full decode, LANCZOS resize, crop,
+    then a second thumbnail() resample.
+
+    Args:
+        data (bytes): The encoded image.
+        size (tuple): The target size (width, height).
+
+    Returns:
+        img (PIL.Image): The thumbnail.
+    """
+    img = Image.open(BytesIO(data))
+    img_ratio = img.width / img.height
+    target_ratio = size[0] / size[1]
+    if img_ratio > target_ratio:
+        new_height = size[1]
+        new_width = int(new_height * img_ratio)
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        left = (img.width - size[0]) / 2
+        img = img.crop((left, 0, left + size[0], size[1]))
+    else:
+        new_width = size[0]
+        new_height = int(new_width / img_ratio)
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        top = (img.height - size[1]) / 2
+        img = img.crop((0, top, size[0], top + size[1]))
+    img.thumbnail((150, 150))
+    return img
+
+
+def current_thumbnail(data, size):
+    """
+    The current thumbnail path through ImagePreview.resize_and_crop.
+
+    Args:
+        data (bytes): The encoded image.
+        size (tuple): The target size (width, height).
+
+    Returns:
+        img (PIL.Image): The thumbnail.
+    """
+    return ImagePreview.resize_and_crop(Image.open(BytesIO(data)), size)
+
+
+def read_peak_rss():
+    """
+    Read the peak resident memory of this process on Linux.
+
+    Returns:
+        (int): The peak resident memory in KB, or None if unsupported.
+    """
+    try:
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_memory(func, data):
+    """
+    Measure how far a single thumbnail call raises the peak memory.
+    Pillow allocates pixel buffers outside the Python heap, so the
+    process's peak resident size is used instead of tracemalloc.
+    Only supported on Linux, where the peak can be reset. Run it in a
+    fresh process so memory freed by earlier runs can't be reused.
+
+    Args:
+        func (function): The thumbnail function to measure.
+        data (bytes): The encoded image.
+
+    Returns:
+        (float): The peak memory increase in MB, or None if unsupported.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")  # Reset the peak resident size
+    except OSError:
+        return None
+    baseline = read_peak_rss()
+    func(data, PREVIEW_SIZE)
+    return (read_peak_rss() - baseline) / 1024
+
+
+def measure(func, data):
+    """
+    Measure the average time and peak memory of a thumbnail path.
+
+    Args:
+        func (function): The thumbnail function to measure.
+        data (bytes): The encoded image.
+
+    Returns:
+        (tuple): The average time in ms and peak memory in MB.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        peak = pool.submit(peak_memory, func, data).result()
+
+    func(data, PREVIEW_SIZE)  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(data, PREVIEW_SIZE)
+    elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+    return elapsed, peak
+
+
+def format_mb(value):
+    """
+    Format a memory measurement for the results table.
+
+    Args:
+        value (float): The memory in MB, or None if unsupported.
+
+    Returns:
+        (string): The formatted value.
+    """
+    return "n/a" if value is None else f"{value:.2f}"
+
+
+def main():
+    """
+    Compare per-tile time and peak memory of the legacy and current
+    thumbnail paths for 4K JPEG/PNG and animated GIF/WebP samples.
+    """
+    samples = {
+        "JPEG 3840x2160": make_sample("JPEG"),
+        "PNG 3840x2160": make_sample("PNG"),
+        "GIF 1920x1080 x8": make_sample("GIF", (1920, 1080), 8),
+        "WebP 1920x1080 x8": make_sample("WEBP", (1920, 1080), 8),
+    }
+
+    print(f"{'sample':<20}{'legacy ms':>12}{'current ms':>12}"
+          f"{'legacy MB':>12}{'current MB':>12}")
+    for name, data in samples.items():
+        legacy_ms, legacy_mb = measure(legacy_thumbnail, data)
+        current_ms, current_mb = measure(current_thumbnail, data)
+        print(f"{name:<20}{legacy_ms:>12.1f}{current_ms:>12.1f}"
+              f"{format_mb(legacy_mb):>12}{format_mb(current_mb):>12}")
+
+
+if __name__ == "__main__":
+    main()
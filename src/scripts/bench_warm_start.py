@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import tempfile
+from PIL import Image
+
+# Allow importing the program modules from src/
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+from session_snapshot import SessionSnapshot  # noqa: E402
+from thumbnail_cache import ThumbnailCache  # noqa: E402
+
+PREVIEW_SIZE = (125, 100)
+NUM_URLS = (50, 200, 500)
+ROUNDS = 5
+
+
+def make_thumbnails(count):
+    """
+    Create noisy thumbnails so the PNG cache can't compress them away.
+
+    Args:
+        count (int): The number of thumbnails.
+
+    Returns:
+        (dict): The thumbnails (PIL.Image) by fake url.
+    """
+    noise = Image.effect_noise(PREVIEW_SIZE, 60).convert("RGB")
+    return {f"https://example.invalid/backdrop_{i}.png":
+            Image.blend(noise, Image.new("RGB", PREVIEW_SIZE,
+                                         (i % 256, 80, 160)), 0.5)
+            for i in range(count)}
+
+
+def time_ms(func):
+    """
+    Measure the average time of a function.
+
+    Args:
+        func (function): The function to measure.
+
+    Returns:
+        (float): The average time in ms.
+    """
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    """
+    Compare showing the last session's thumbnails from the snapshot blob
+    with loading each one from the on-disk thumbnail cache.
+    """
+    print(f"{'previews':<10}{'snapshot ms':>14}{'disk cache ms':>16}"
+          f"{'snapshot KB':>14}")
+    for count in NUM_URLS:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            css_path = os.path.join(temp_dir, "DiscordPlus.theme.css")
+            with open(css_path, "w") as file:
+                file.write(":root { --dplus-backdrop: url(); }\n")
+
+            thumbnails = make_thumbnails(count)
+            urls = list(thumbnails)
+            snapshot_path = os.path.join(temp_dir, "discordplus.snap")
+            SessionSnapshot(css_path, urls, urls,
+                            preview_size=PREVIEW_SIZE,
+                            thumbnails=thumbnails).save(snapshot_path)
+
+            cache = ThumbnailCache(os.path.join(temp_dir, "thumbnails"))
+            os.makedirs(cache.cache_dir)
+            for url, img in thumbnails.items():
+                cache.store(url, [img])
+
+            snapshot_ms = time_ms(lambda: SessionSnapshot.load(snapshot_path))
+            disk_ms = time_ms(lambda: [cache.load(url, PREVIEW_SIZE)
+                                       for url in urls])
+            size_kb = os.path.getsize(snapshot_path) / 1024
+            print(f"{count:<10}{snapshot_ms:>14.1f}{disk_ms:>16.1f}"
+                  f"{size_kb:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,8 +25,8 @@ def check_requirements():
 
     # Install missing requirements
     for requirement in requirements:
-        requirement = requirement.strip()
-        if requirement and not requirement.startswith("#"):
+        requirement = requirement.split("#")[0].strip()  # Drop comments
+        if requirement:
             try:  # to import the module
                 module_name = requirement.split(">")[0].split("=")[0].strip()
                 __import__(module_name)
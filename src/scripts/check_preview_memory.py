@@ -0,0 +1,427 @@
+import gc
+import os
+import sys
+import time
+import heapq
+import weakref
+import tempfile
+import threading
+import itertools
+import tracemalloc
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+
+# Allow importing the program modules from src/
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+import image_preview  # noqa: E402
+import preview_renderers  # noqa: E402
+from image_preview import ImagePreview  # noqa: E402
+from image_stats import ImageStatsIndex  # noqa: E402
+from thumbnail_cache import (FailureCache, MemoryThumbnailCache,  # noqa: E402
+                             ThumbnailCache)
+
+NUM_URLS = 120
+DUPLICATE_EVERY = 5  # Every 5th url serves an earlier url's image
+MISSING_EVERY = 17  # Every 17th url is a 404
+MEMORY_CACHE_BYTES = 2 * 1024 * 1024  # Less than the thumbnails
+WARMUP_CYCLES = 5
+CYCLES = 30
+SETTLE_TIMEOUT = 20  # seconds to wait for a reload's fetches
+MAX_GROWTH_BYTES = 512 * 1024  # Allowed Python heap growth over all cycles
+
+
+class FakeTcl:
+    """
+    The state Tk keeps for the whole interpreter: scheduled after()
+    callbacks, "all" bindings and errors raised by callbacks.
+    """
+    def __init__(self):
+        self.timers = []  # Heap of (due, id, widget, func)
+        self.all_bindings = {}  # Command name by sequence
+        self.ids = itertools.count()
+        self.errors = []
+
+
+class FakeWidget:
+    """
+    Stands in for a Tk widget, holding its Python callbacks the way
+    tkinter does. bind(), bind_all() and after() register a command on
+    the widget that keeps the callable alive until it is unbound,
+    cancelled or run, or until the widget is destroyed.
+    """
+    tcl = None  # The FakeTcl of every widget
+    width = 900
+    height = 500
+
+    def __init__(self, master=None, **options):
+        self.master = master
+        self.children = []
+        self.commands = {}  # Callables by command name, like _tclCommands
+        self.bindings = {}  # Command name by sequence
+        self.items = {}  # Canvas items, coordinates by id
+        self.options = dict(options)
+        self.destroyed = False
+        if master is not None:
+            master.children.append(self)
+
+    def register(self, func):
+        name = f"cmd{next(self.tcl.ids)}"
+        self.commands[name] = func
+        return name
+
+    def bind(self, sequence, func, add=None):
+        name = self.register(func)
+        self.bindings[sequence] = name  # Replaces the command, not deleted
+        return name
+
+    def unbind(self, sequence, funcid=None):
+        self.bindings.pop(sequence, None)
+        if funcid is not None:
+            self.commands.pop(funcid, None)
+
+    def bind_all(self, sequence, func, add=None):
+        self.tcl.all_bindings[sequence] = self.register(func)
+
+    def event_generate(self, sequence):
+        name = self.bindings.get(sequence)
+        if name in self.commands:
+            self.call(self.commands[name], None)
+
+    def after(self, ms, func, *args):
+        name = self.register((lambda: func(*args)) if args else func)
+        heapq.heappush(self.tcl.timers,
+                       (time.monotonic() + ms / 1000, name, self))
+        return name
+
+    def after_cancel(self, name):
+        self.commands.pop(name, None)
+
+    def call(self, func, *args):
+        try:
+            func(*args)
+        except Exception as e:  # Tk reports these and keeps running
+            self.tcl.errors.append(repr(e))
+
+    def destroy(self):
+        for child in list(self.children):
+            child.destroy()
+        if self.destroyed:
+            return
+        self.destroyed = True
+        self.event_generate("<Destroy>")
+        self.commands = {}
+        self.bindings = {}
+        if self.master is not None:
+            self.master.children.remove(self)
+
+    def winfo_children(self):
+        return list(self.children)
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def pack(self, **options):
+        pass
+
+    def place(self, **options):
+        pass
+
+    def place_forget(self):
+        pass
+
+    def set(self, first, last):
+        pass
+
+    def yview(self, *args):
+        pass
+
+    def yview_scroll(self, number, what):
+        pass
+
+    def canvasx(self, x):
+        return x
+
+    def canvasy(self, y):
+        if self.destroyed:
+            raise RuntimeError("invalid command name (destroyed canvas)")
+        return y
+
+    def create_item(self, *coords, **options):
+        item = next(self.tcl.ids)
+        self.items[item] = list(coords)
+        return item
+
+    create_image = create_rectangle = create_window = create_item
+
+    def coords(self, item, *coords):
+        if coords:
+            self.items[item] = list(coords)
+        return self.items[item]
+
+    def itemconfig(self, item, **options):
+        pass
+
+    def tag_lower(self, item, below):
+        pass
+
+    def delete(self, item):
+        self.items.pop(item, None)
+
+
+class FakePhotoImage:
+    """
+    Stands in for ImageTk.PhotoImage, holding a copy of the pixels like
+    Tk does.
+    """
+    alive = weakref.WeakSet()
+
+    def __init__(self, img):
+        self.pixels = bytearray(img.tobytes())
+        FakePhotoImage.alive.add(self)
+
+    def paste(self, img):
+        self.pixels[:] = img.tobytes()
+
+
+class FakeModule:
+    """
+    Stands in for the tkinter, ttk and ImageTk modules.
+    """
+    Frame = Canvas = Label = Scrollbar = FakeWidget
+    PhotoImage = FakePhotoImage
+
+
+def update(tcl):
+    """
+    Run the after() callbacks that are due, like Tk's event loop.
+
+    Args:
+        tcl (FakeTcl): The fake interpreter.
+    """
+    now = time.monotonic()
+    while tcl.timers and tcl.timers[0][0] <= now:
+        _, name, widget = heapq.heappop(tcl.timers)
+        func = widget.commands.pop(name, None)
+        if func is not None:  # Not cancelled or destroyed
+            widget.call(func)
+
+
+def pump(tcl, preview, timeout=SETTLE_TIMEOUT):
+    """
+    Run the event loop until a preview grid has no fetches left.
+
+    Args:
+        tcl (FakeTcl): The fake interpreter.
+        preview (ImagePreview): The preview grid.
+        timeout (float): The most seconds to wait.
+    """
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        update(tcl)
+        if not preview.fetching_urls and preview.poll_id is None:
+            return
+        time.sleep(0.005)
+    print(f"  Timed out with {len(preview.fetching_urls)} fetches left")
+
+
+def worker_threads():
+    """
+    Count the preview grids' fetch worker threads that are running.
+
+    Returns:
+        (int): The number of worker threads.
+    """
+    return sum(1 for thread in threading.enumerate()
+               if thread.name.startswith("preview"))
+
+
+def make_images():
+    """
+    Create the encoded images served for the fake backdrop urls.
+
+    Returns:
+        images (dict): The (content type, bytes) of each path.
+    """
+    images = {}
+    for i in range(NUM_URLS):
+        if i % MISSING_EVERY == MISSING_EVERY - 1:
+            continue
+        source = i - 1 if i % DUPLICATE_EVERY == 0 and i else i
+        img = Image.new("RGB", (640, 360), (source % 256, 90, 160))
+        fmt, content_type = (("GIF", "image/gif") if source % 7 == 3 else
+                             ("PNG", "image/png"))
+        buffer = BytesIO()
+        img.save(buffer, fmt)
+        images[f"/backdrop_{i}.{fmt.lower()}"] = (content_type,
+                                                  buffer.getvalue())
+    return images
+
+
+def serve(images):
+    """
+    Serve the images from a local HTTP server on a background thread.
+
+    Args:
+        images (dict): The (content type, bytes) of each path.
+
+    Returns:
+        (ThreadingHTTPServer): The running server.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            found = images.get(self.path)
+            if found is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", found[0])
+            self.send_header("Content-Length", str(len(found[1])))
+            self.end_headers()
+            self.wfile.write(found[1])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reload_cycle(tcl, grid_frame, preview, urls, i, refs):
+    """
+    Run the reloads of one edit cycle like BaseGUI does: opening the file
+    again through a new grid, deleting and restoring a backdrop with
+    update_urls, rechecking with load_images and resizing the window.
+
+    Args:
+        tcl (FakeTcl): The fake interpreter.
+        grid_frame (FakeWidget): The frame holding the preview grid.
+        preview (ImagePreview): The current preview grid.
+        urls (list): The full list of backdrop urls.
+        i (int): The cycle number.
+        refs (list): Weak references to every grid created, updated.
+
+    Returns:
+        preview (ImagePreview): The new preview grid.
+    """
+    # show_file: the old grid is destroyed before the new one is made
+    for widget in grid_frame.winfo_children():
+        widget.destroy()
+    preview = ImagePreview(grid_frame, urls, onclick=lambda url: None,
+                           renderer="canvas" if i % 2 else "label",
+                           onstatus=lambda text: None,
+                           active_url=urls[i % WARMUP_CYCLES])
+    refs.append(weakref.ref(preview))
+    pump(tcl, preview)
+
+    # The warm up cycles have already cached the previews shown for these
+    removed = urls[i % WARMUP_CYCLES]
+    preview.update_urls([url for url in urls if url != removed])
+    pump(tcl, preview)
+    preview.update_urls(urls)
+    pump(tcl, preview)
+    preview.load_images()
+    grid_frame.event_generate("<Configure>")
+    pump(tcl, preview)
+    return preview
+
+
+def main():
+    """
+    Check that repeated reloads of the preview grid, through the same
+    ImagePreview calls as BaseGUI, don't keep old grids alive or grow
+    the Python heap, the PhotoImages, the scheduled callbacks or the
+    threads. Tk is replaced by fakes that hold callbacks the way tkinter
+    does, so no display is needed. Exits with status 1 on failure.
+    """
+    for module in (image_preview, preview_renderers):
+        module.tk = module.ttk = FakeModule
+    preview_renderers.ImageTk = FakeModule
+    tcl = FakeWidget.tcl = FakeTcl()
+
+    cache_dir = tempfile.mkdtemp(prefix="preview_memory_")
+    ThumbnailCache._shared = ThumbnailCache(cache_dir)
+    FailureCache._shared = FailureCache(cache_dir)
+    ImageStatsIndex._shared = ImageStatsIndex(cache_dir)
+    MemoryThumbnailCache._shared = MemoryThumbnailCache(MEMORY_CACHE_BYTES)
+
+    images = make_images()
+    server = serve(images)
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = []
+    for i in range(NUM_URLS):
+        fmt = "gif" if f"/backdrop_{i}.gif" in images else "png"
+        urls.append(f"{host}/backdrop_{i}.{fmt}")
+
+    grid_frame = FakeWidget()
+    refs = []
+    preview = None
+    for i in range(WARMUP_CYCLES):
+        preview = reload_cycle(tcl, grid_frame, preview, urls, i, refs)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    photos_before = len(FakePhotoImage.alive)
+    for i in range(WARMUP_CYCLES, WARMUP_CYCLES + CYCLES):
+        preview = reload_cycle(tcl, grid_frame, preview, urls, i, refs)
+    time.sleep(0.2)  # Let the workers of the destroyed grids exit
+    update(tcl)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    photos_after = len(FakePhotoImage.alive)
+    threads = worker_threads()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "lineno")
+    growth = sum(stat.size_diff for stat in stats)
+    alive = [ref() for ref in refs if ref() is not None]
+    timers = sum(1 for _, name, widget in tcl.timers
+                 if name in widget.commands)
+    print(f"Reloaded {len(refs)} grids of {NUM_URLS} urls, "
+          f"{CYCLES} cycles measured")
+    print(f"Python heap growth over {CYCLES} cycles: {growth / 1024:.1f} KB")
+    print(f"Grids alive: {len(alive)} of {len(refs)}")
+    print(f"PhotoImages: {photos_before} -> {photos_after}")
+    print(f"Worker threads: {threads}, at most "
+          f"{ImagePreview.MAX_WORKERS} for the open grid")
+    print(f"Scheduled callbacks: {timers}, callback errors: "
+          f"{len(tcl.errors)}")
+    for stat in stats[:5]:
+        print(f"  {stat}")
+
+    problems = []
+    if alive != [preview]:
+        problems.append(f"{len(alive) - 1} destroyed grids are still alive")
+    if growth > MAX_GROWTH_BYTES:
+        problems.append("the Python heap grew")
+    if photos_after > photos_before:
+        problems.append("PhotoImages aren't freed or reused")
+    if threads > ImagePreview.MAX_WORKERS:
+        problems.append("worker threads of destroyed grids are running")
+    if any(widget is not grid_frame or
+           getattr(widget.commands[name], "__self__", preview) is not preview
+           for _, name, widget in tcl.timers if name in widget.commands):
+        problems.append("destroyed grids still have callbacks scheduled")
+    if tcl.errors:
+        problems.append(f"callbacks raised: {tcl.errors[:3]}")
+    server.shutdown()
+    if problems:
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        sys.exit(1)
+    print("OK: memory is flat across reloads")
+
+
+if __name__ == "__main__":
+    main()
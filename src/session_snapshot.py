@@ -0,0 +1,194 @@
+import os
+import json
+import mmap
+import struct
+from PIL import Image
+from setup import Setup
+
+
+class SessionSnapshot:
+    """
+    A compact snapshot of the last opened theme file, written on exit so
+    the next launch can draw the same grid before any parsing or network
+    work. The backdrop index and the raw thumbnail pixels are packed into
+    one blob that is read back through a single memory map.
+
+    Blob layout: MAGIC, the header length as a little-endian uint32,
+    the JSON header, then the thumbnails' raw pixels back to back.
+    Thumbnails with the same content hash are stored once.
+    """
+    MAGIC = b"VCTSNAP2"
+    HEADER_LENGTH = struct.Struct("<I")
+
+    def __init__(self, file_path, img_urls, backdrop_urls,
+                 active_url=None, file_stat=None, preview_size=None,
+                 thumbnails=None, digests=None):
+        """
+        Initialize the SessionSnapshot.
+
+        Args:
+            file_path (string): The path of the theme CSS file.
+            img_urls (list): The urls shown in the preview grid.
+            backdrop_urls (list): The urls in the backdrop dropdown.
+            active_url (string): The active backdrop url.
+            file_stat (list): The [mtime_ns, size] of the file when saved.
+            preview_size (tuple): The thumbnail size (width, height).
+            thumbnails (dict): The thumbnails (PIL.Image) by url.
+            digests (dict): The content hashes of the thumbnails by url.
+        """
+        self.file_path = file_path
+        self.img_urls = img_urls
+        self.backdrop_urls = backdrop_urls
+        self.active_url = active_url
+        self.file_stat = file_stat or self.stat(file_path)
+        self.preview_size = tuple(preview_size or (0, 0))
+        self.thumbnails = thumbnails or {}
+        self.digests = digests or {}
+
+    @staticmethod
+    def path(theme_name):
+        """
+        Get the path of the snapshot file for a theme.
+
+        Args:
+            theme_name (string): The name of the theme.
+
+        Returns:
+            (string): The path of the snapshot file.
+        """
+        return os.path.join(Setup.app_data_dir("snapshots"),
+                            f"{theme_name.lower()}.snap")
+
+    @staticmethod
+    def stat(file_path):
+        """
+        Get the modification time and size of a file.
+
+        Args:
+            file_path (string): The path of the file.
+
+        Returns:
+            (list): The [mtime_ns, size] of the file, or None if missing.
+        """
+        try:
+            info = os.stat(file_path)
+        except OSError:
+            return None
+        return [info.st_mtime_ns, info.st_size]
+
+    def is_current(self):
+        """
+        Check if the theme file is unchanged since the snapshot was saved.
+
+        Returns:
+            (boolean): True if the snapshot's index is still valid.
+        """
+        return (self.file_stat is not None and
+                self.stat(self.file_path) == list(self.file_stat))
+
+    def save(self, path):
+        """
+        Write the snapshot to disk, replacing the previous one atomically.
+
+        Args:
+            path (string): The path of the snapshot file.
+        """
+        entries = []
+        blobs = []
+        offsets = {}  # Offsets of the stored pixels by content hash
+        offset = 0
+        for url, img in self.thumbnails.items():
+            digest = self.digests.get(url)
+            if digest in offsets:
+                entries.append([url, img.mode, img.width, img.height,
+                                *offsets[digest], digest])
+                continue
+            pixels = img.tobytes()
+            entries.append([url, img.mode, img.width, img.height,
+                            offset, len(pixels), digest])
+            blobs.append(pixels)
+            if digest is not None:
+                offsets[digest] = (offset, len(pixels))
+            offset += len(pixels)
+
+        header = json.dumps({
+            "file_path": self.file_path,
+            "file_stat": self.file_stat,
+            "img_urls": self.img_urls,
+            "backdrop_urls": self.backdrop_urls,
+            "active_url": self.active_url,
+            "preview_size": list(self.preview_size),
+            "thumbnails": entries,
+        }).encode("utf-8")
+
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(self.MAGIC)
+                file.write(self.HEADER_LENGTH.pack(len(header)))
+                file.write(header)
+                for pixels in blobs:
+                    file.write(pixels)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Failed to save session snapshot: {e}")
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a snapshot from disk.
+
+        Args:
+            path (string): The path of the snapshot file.
+
+        Returns:
+            (SessionSnapshot): The snapshot, or None if missing or invalid.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as file:
+                with mmap.mmap(file.fileno(), 0,
+                               access=mmap.ACCESS_READ) as data:
+                    return cls.parse(data)
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            print(f"Failed to read session snapshot: {e}")
+            return None
+
+    @classmethod
+    def parse(cls, data):
+        """
+        Unpack a snapshot blob.
+
+        Args:
+            data (mmap.mmap): The mapped snapshot file.
+
+        Returns:
+            (SessionSnapshot): The snapshot.
+
+        Raises:
+            ValueError: If the blob isn't a snapshot.
+        """
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError("not a session snapshot")
+        start = len(cls.MAGIC) + cls.HEADER_LENGTH.size
+        (length,) = cls.HEADER_LENGTH.unpack_from(data, len(cls.MAGIC))
+        header = json.loads(data[start:start + length].decode("utf-8"))
+
+        pixels_start = start + length
+        thumbnails = {}
+        digests = {}
+        images = {}  # Decoded thumbnails by offset, shared by duplicates
+        for (url, mode, width, height, offset, size,
+             digest) in header["thumbnails"]:
+            if offset not in images:
+                begin = pixels_start + offset
+                images[offset] = Image.frombytes(
+                    mode, (width, height), data[begin:begin + size])
+            thumbnails[url] = images[offset]
+            if digest is not None:
+                digests[url] = digest
+        return cls(header["file_path"], header["img_urls"],
+                   header["backdrop_urls"], header["active_url"],
+                   header["file_stat"], header["preview_size"], thumbnails,
+                   digests)
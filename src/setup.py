@@ -1,3 +1,4 @@
+import os
 import tkinter as tk
 import webbrowser
 
@@ -75,6 +76,25 @@ class Setup:
 
         set_entry_width()
 
+    @staticmethod
+    def app_data_dir(*parts):
+        """
+        Resolve (and create) a directory for the program's own data,
+        such as cached previews.
+        Uses APPDATA on Windows and ~/.cache otherwise.
+
+        Args:
+            *parts (string): Sub directories within the program data folder.
+
+        Returns:
+            (string): The absolute path to the directory.
+        """
+        base_path = (os.environ.get("APPDATA") or
+                     os.path.join(os.path.expanduser("~"), ".cache"))
+        path = os.path.join(base_path, Setup.EXE_NAME, *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
     @staticmethod
     def toggle_stay_on_top(self):
         """
@@ -47,18 +47,4 @@ class ClearVisGUI(BaseGUI):
             f"VCTheme | {self.theme_config[0]} | {self.current_version}")
 
         self.setup_menu()
-
-    def open_file(self):
-        """
-        Open a file dialog to select a CSS file.
-        Overrides the base method to initialize the BackdropManager.
-        """
-        file_path = super().open_file()
-        if file_path:
-            self.css_file_path = file_path
-            self.backdrop_manager = BackdropManager(self.css_file_path)
-            with open(file_path, "r") as file:
-                css_content = file.read()
-                backdrop_urls = self.extract_backdrops(css_content)
-
-            self.populate_dropdown(backdrop_urls)
+        self.restore_snapshot()
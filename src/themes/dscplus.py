@@ -48,21 +48,7 @@ class DSCPlusGUI(BaseGUI):
             f"VCTheme | {self.theme_config[0]} | {self.current_version}")
 
         self.setup_menu()
-
-    def open_file(self):
-        """
-        Open a file dialog to select a CSS file.
-        Overrides the base method to initialize the BackdropManager.
-        """
-        file_path = super().open_file()
-        if file_path:
-            self.css_file_path = file_path
-            self.backdrop_manager = BackdropManager(self.css_file_path)
-            with open(file_path, "r") as file:
-                css_content = file.read()
-                backdrop_urls = self.extract_backdrops(css_content)
-
-            self.populate_dropdown(backdrop_urls)
+        self.restore_snapshot()
 
     def add_backdrop_to_css(self):
         """
@@ -78,45 +64,18 @@ class DSCPlusGUI(BaseGUI):
             return
         link = self.backdrop_entry.get()
         if link and re.match(r'^https?:\/\/.*\.(png|jpg|jpeg|gif)$', link):
-            with open(self.css_file_path, "r") as file:
-                css_content = file.readlines()
-
-            if not any(f"url({link})" in line for line in css_content):
-                backdrop_section_dark = -1
-                backdrop_section_light = -1
-                for i, line in enumerate(css_content):
-                    if ".theme-dark" in line:
-                        backdrop_section_dark = i
-                    elif ".theme-light" in line:
-                        backdrop_section_light = i
-
-                index_last_backdrop_dark = -1
-                index_last_backdrop_light = -1
-                for i, line in reversed(list(enumerate(css_content))):
-                    if (self.theme_config[2] in line and
-                            i > backdrop_section_dark and
-                            (backdrop_section_light == -1 or
-                             i < backdrop_section_light)):
-                        index_last_backdrop_dark = i
-                        break
-
-                for i, line in reversed(list(enumerate(css_content))):
-                    if (self.theme_config[2] in line and
-                            i > backdrop_section_light):
-                        index_last_backdrop_light = i
-                        break
-
-                with open(self.css_file_path, "w") as file:
-                    for i, line in enumerate(css_content):
-                        file.write(line)
-                        if (i == index_last_backdrop_dark and
-                                backdrop_section_dark != -1):
-                            file.write(
-                                f"/*{self.theme_config[2]}: url({link});*/\n")
-                        if (i == index_last_backdrop_light and
-                                backdrop_section_light != -1):
-                            file.write(
-                                f"/*{self.theme_config[2]}: url({link});*/\n")
+            index = self.backdrop_manager.get_index()
+
+            if not index.find(link):
+                # Add the link after the last backdrop of the dark and
+                # light sections, shifting for the lines inserted before
+                positions = sorted(entry.line + 1 for entry in (
+                    index.last_entry("dark"), index.last_entry("light"))
+                    if entry is not None)
+                index.insert([position + count for count, position
+                              in enumerate(positions)],
+                             index.declaration(link))
+                self.backdrop_manager.save_index()
 
                 menu = self.backdrop_menu['menu']
                 count = menu.index("end")
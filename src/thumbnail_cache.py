@@ -0,0 +1,596 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+from setup import Setup
+
+
+class ThumbnailCache:
+    """
+    A persistent on-disk cache of resized preview thumbnails keyed by url.
+    Stores the ETag/Last-Modified validators of each image so previews can
+    be revalidated with conditional requests instead of downloaded again.
+    Each image is cached at every preview zoom level, and the thumbnail
+    files are named by the SHA-256 of the downloaded image, so urls
+    serving the same image share their files.
+    The least recently used thumbnails are evicted past the size cap.
+    """
+    MAX_BYTES = 64 * 1024 * 1024  # Default size cap for cached thumbnails
+    INDEX_FILE = "index.json"
+
+    _shared = None
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Initialize the ThumbnailCache and load its index from disk.
+
+        Args:
+            cache_dir (string): The directory to store thumbnails in.
+            max_bytes (int): The size cap of the cache in bytes.
+        """
+        self.cache_dir = cache_dir or Setup.app_data_dir("thumbnails")
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries = self.read_index()
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the cache instance shared by every preview grid.
+
+        Returns:
+            (ThumbnailCache): The shared cache.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def level_key(size):
+        """
+        Get the key of a thumbnail size in a cache entry's files.
+
+        Args:
+            size (tuple): The thumbnail size (width, height).
+
+        Returns:
+            (string): The key, like "125x100".
+        """
+        return f"{size[0]}x{size[1]}"
+
+    def read_index(self):
+        """
+        Read the cache index, dropping entries whose thumbnails are missing.
+
+        Returns:
+            entries (dict): Cache entries keyed by url.
+        """
+        try:
+            with open(self.index_path, "r") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        for entry in entries.values():
+            if "files" not in entry:  # Single size entry of older versions
+                entry["files"] = {self.level_key(entry.pop("size")):
+                                  entry.pop("file")}
+        return {url: entry for url, entry in entries.items()
+                if all(os.path.exists(self.thumb_path(file_name))
+                       for file_name in entry["files"].values())}
+
+    def thumb_path(self, file_name):
+        """
+        Resolve the path of a cached thumbnail file.
+
+        Args:
+            file_name (string): The name of the thumbnail file.
+
+        Returns:
+            (string): The absolute path to the thumbnail.
+        """
+        return os.path.join(self.cache_dir, file_name)
+
+    def get(self, url, size):
+        """
+        Get the cache entry for a url if it was cached at the given size.
+
+        Args:
+            url (string): The url of the image.
+            size (tuple): The thumbnail size (width, height).
+
+        Returns:
+            (dict): The cache entry, or None if not cached.
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry and self.level_key(size) in entry["files"]:
+                return dict(entry)
+        return None
+
+    def validators(self, entry):
+        """
+        Build conditional request headers for a cache entry.
+
+        Args:
+            entry (dict): The cache entry to revalidate.
+
+        Returns:
+            headers (dict): If-None-Match/If-Modified-Since headers.
+        """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, url, size):
+        """
+        Load a cached thumbnail and mark it as recently used.
+
+        Args:
+            url (string): The url of the image.
+            size (tuple): The thumbnail size (width, height).
+
+        Returns:
+            img (PIL.Image): The cached thumbnail, or None if unavailable.
+        """
+        entry = self.get(url, size)
+        if not entry:
+            return None
+        try:
+            file_name = entry["files"][self.level_key(size)]
+            with Image.open(self.thumb_path(file_name)) as img:
+                img.load()
+        except OSError:
+            self.remove(url)
+            return None
+        self.touch(url)
+        return img
+
+    def store(self, url, images, etag=None, last_modified=None, digest=None):
+        """
+        Save the thumbnails of an image with its validators, evicting old
+        entries past the size cap. Thumbnails of identical images are only
+        saved once.
+
+        Args:
+            url (string): The url of the image.
+            images (list): The thumbnail (PIL.Image) at each zoom level,
+                           with the full size of the image in their info
+                           as "native_size".
+            etag (string): The ETag header of the response.
+            last_modified (string): The Last-Modified header of the response.
+            digest (string): The SHA-256 hex digest of the image data.
+        """
+        if digest is None:
+            name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        else:
+            name = digest
+        files = {}
+        file_bytes = 0
+        try:
+            for img in images:
+                key = self.level_key(img.size)
+                file_name = f"{name}_{key}.png"
+                path = self.thumb_path(file_name)
+                if digest is None or not os.path.exists(path):
+                    img.save(path, "PNG")
+                files[key] = file_name
+                file_bytes += os.path.getsize(path)
+        except OSError as e:
+            print(f"Failed to cache thumbnail for {url}: {e}")
+            return
+
+        native_size = images[0].info.get("native_size")
+        self.add_entry(url, {
+            "files": files,
+            "hash": digest,
+            "native_size": native_size and list(native_size),
+            "bytes": file_bytes,
+            "etag": etag,
+            "last_modified": last_modified,
+        })
+
+    def share(self, url, digest, etag=None, last_modified=None):
+        """
+        Cache a url with the thumbnails of an already cached url with the
+        same image content, without decoding the image again.
+
+        Args:
+            url (string): The url of the image.
+            digest (string): The SHA-256 hex digest of the image data.
+            etag (string): The ETag header of the response.
+            last_modified (string): The Last-Modified header of the response.
+
+        Returns:
+            (boolean): True if the image was already cached.
+        """
+        with self.lock:
+            match = next((entry for entry in self.entries.values()
+                          if entry.get("hash") == digest), None)
+        if match is None:
+            return False
+        self.add_entry(url, {
+            "files": dict(match["files"]),
+            "hash": digest,
+            "native_size": match.get("native_size"),
+            "bytes": match["bytes"],
+            "etag": etag,
+            "last_modified": last_modified,
+        })
+        return True
+
+    def add_entry(self, url, entry):
+        """
+        Add or replace the cache entry of a url.
+
+        Args:
+            url (string): The url of the image.
+            entry (dict): The cache entry.
+        """
+        entry["accessed"] = time.time()
+        with self.lock:
+            old = self.entries.get(url)
+            self.entries[url] = entry
+            if old:
+                self.release_files(old)
+            self.dirty = True
+            self.evict()
+
+    def touch(self, url):
+        """
+        Mark a cached thumbnail as recently used.
+
+        Args:
+            url (string): The url of the image.
+        """
+        with self.lock:
+            if url in self.entries:
+                self.entries[url]["accessed"] = time.time()
+                self.dirty = True
+
+    def remove(self, url):
+        """
+        Remove a thumbnail from the cache.
+
+        Args:
+            url (string): The url of the image.
+        """
+        with self.lock:
+            entry = self.entries.pop(url, None)
+            if entry:
+                self.release_files(entry)
+                self.dirty = True
+
+    def evict(self):
+        """
+        Remove the least recently used thumbnails until the cache fits
+        within its size cap. Must be called with the lock held.
+        """
+        files = {tuple(sorted(entry["files"].values())): entry["bytes"]
+                 for entry in self.entries.values()}
+        total = sum(files.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.entries.items(),
+                                 key=lambda item: item[1]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            del self.entries[url]
+            if self.release_files(entry):
+                total -= entry["bytes"]
+
+    def release_files(self, entry):
+        """
+        Delete the thumbnail files of a removed entry that no other url
+        uses anymore. Must be called with the lock held.
+
+        Args:
+            entry (dict): The removed cache entry.
+
+        Returns:
+            (boolean): True if the files were deleted.
+        """
+        in_use = {file_name for other in self.entries.values()
+                  for file_name in other["files"].values()}
+        released = False
+        for file_name in entry["files"].values():
+            if file_name not in in_use:
+                self.delete_file(file_name)
+                released = True
+        return released
+
+    def delete_file(self, file_name):
+        """
+        Delete a thumbnail file, ignoring files that are already gone.
+
+        Args:
+            file_name (string): The name of the thumbnail file.
+        """
+        try:
+            os.remove(self.thumb_path(file_name))
+        except OSError:
+            pass
+
+    def flush(self):
+        """
+        Write the cache index to disk if it has changed.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.entries)
+            self.dirty = False
+        try:
+            with open(self.index_path, "w") as file:
+                file.write(data)
+        except OSError as e:
+            print(f"Failed to save thumbnail cache index: {e}")
+
+
+class MemoryThumbnailCache:
+    """
+    A process-wide LRU of decoded thumbnails, bounded by a memory budget.
+    Outlives preview grids and GUI switches so thumbnails that were already
+    decoded in this session aren't fetched or decoded again. Urls with the
+    same image content share one decoded thumbnail.
+    """
+    MAX_BYTES = 48 * 1024 * 1024  # Default memory budget
+
+    _shared = None
+
+    def __init__(self, max_bytes=None):
+        """
+        Initialize the MemoryThumbnailCache with a memory budget.
+
+        Args:
+            max_bytes (int): The memory budget for thumbnails in bytes.
+        """
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.entries = OrderedDict()  # Least recently used first
+        self.digests = {}  # Content hash of each entry that has one
+        self.shared_images = {}  # [image, entries] by (hash, size)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the cache instance shared by the whole program.
+
+        Returns:
+            (MemoryThumbnailCache): The shared cache.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def image_bytes(img):
+        """
+        Estimate the memory used by a decoded image's pixels.
+
+        Args:
+            img (PIL.Image): The image to measure.
+
+        Returns:
+            (int): The size of the image's pixels in bytes.
+        """
+        return img.width * img.height * len(img.getbands())
+
+    def get(self, url, size):
+        """
+        Get a decoded thumbnail and mark it as recently used.
+
+        Args:
+            url (string): The url of the image.
+            size (tuple): The thumbnail size (width, height).
+
+        Returns:
+            img (PIL.Image): The thumbnail, or None if not cached.
+        """
+        key = (url, tuple(size))
+        with self.lock:
+            img = self.entries.get(key)
+            if img is not None:
+                self.entries.move_to_end(key)
+            return img
+
+    def put(self, url, size, img, digest=None):
+        """
+        Add a decoded thumbnail, evicting the least recently used
+        thumbnails past the memory budget. Thumbnails with a content hash
+        that is already cached reuse the cached image.
+
+        Args:
+            url (string): The url of the image.
+            size (tuple): The thumbnail size (width, height).
+            img (PIL.Image): The thumbnail.
+            digest (string): The SHA-256 hex digest of the image data.
+
+        Returns:
+            img (PIL.Image): The cached thumbnail, shared by every url
+                             with the same content.
+        """
+        key = (url, tuple(size))
+        with self.lock:
+            if key in self.entries:
+                self.drop(key)
+            if digest is not None:
+                shared = self.shared_images.setdefault(
+                    (digest, tuple(size)), [img, 0])
+                if shared[1] == 0:
+                    self.total_bytes += self.image_bytes(img)
+                img = shared[0]
+                shared[1] += 1
+                self.digests[key] = digest
+            else:
+                self.total_bytes += self.image_bytes(img)
+            self.entries[key] = img
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                self.drop(next(iter(self.entries)))
+            return img
+
+    def drop(self, key):
+        """
+        Remove an entry, freeing its image once no other url shares it.
+        Must be called with the lock held.
+
+        Args:
+            key (tuple): The (url, size) of the entry.
+        """
+        img = self.entries.pop(key)
+        digest = self.digests.pop(key, None)
+        if digest is None:
+            self.total_bytes -= self.image_bytes(img)
+            return
+        shared_key = (digest, key[1])
+        shared = self.shared_images[shared_key]
+        shared[1] -= 1
+        if shared[1] == 0:
+            del self.shared_images[shared_key]
+            self.total_bytes -= self.image_bytes(img)
+
+    def digest(self, url, size):
+        """
+        Get the content hash of a cached thumbnail.
+
+        Args:
+            url (string): The url of the image.
+            size (tuple): The thumbnail size (width, height).
+
+        Returns:
+            (string): The SHA-256 hex digest, or None if unknown.
+        """
+        with self.lock:
+            return self.digests.get((url, tuple(size)))
+
+
+class FailureCache:
+    """
+    A persistent negative cache of backdrop urls that failed to load,
+    such as dead links or web pages behind image urls. Known-bad urls are
+    skipped until the time to live of their failure class runs out.
+    """
+    FILE_NAME = "failures.json"
+    # Seconds to skip a url for by failure class, other failures like lost
+    # connections are transient and never cached
+    TTLS = {
+        "not_found": 7 * 24 * 60 * 60,
+        "not_image": 7 * 24 * 60 * 60,
+        "too_large": 7 * 24 * 60 * 60,
+        "error": 60 * 60,
+        "timeout": 15 * 60,
+    }
+
+    _shared = None
+
+    def __init__(self, cache_dir=None):
+        """
+        Initialize the FailureCache and load it from disk.
+
+        Args:
+            cache_dir (string): The directory to store the cache in.
+        """
+        cache_dir = cache_dir or Setup.app_data_dir("thumbnails")
+        self.path = os.path.join(cache_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries = self.read()
+
+    @classmethod
+    def shared(cls):
+        """
+        Get the cache instance shared by every preview grid.
+
+        Returns:
+            (FailureCache): The shared cache.
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def read(self):
+        """
+        Read the cached failures, dropping the expired ones.
+
+        Returns:
+            entries (dict): Failures with their class and expiry by url.
+        """
+        try:
+            with open(self.path, "r") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {url: entry for url, entry in entries.items()
+                if entry["expires"] > now}
+
+    def get(self, url):
+        """
+        Get the failure class of a known-bad url.
+
+        Args:
+            url (string): The url of the image.
+
+        Returns:
+            (string): The failure class, or None if the url isn't known-bad.
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            if entry["expires"] <= time.time():
+                del self.entries[url]
+                self.dirty = True
+                return None
+            return entry["reason"]
+
+    def record(self, url, reason):
+        """
+        Remember that a url failed, if its failure class is cached.
+
+        Args:
+            url (string): The url of the image.
+            reason (string): The failure class.
+        """
+        ttl = self.TTLS.get(reason)
+        if ttl is None:
+            return
+        with self.lock:
+            self.entries[url] = {"reason": reason,
+                                 "expires": time.time() + ttl}
+            self.dirty = True
+
+    def forget(self, urls):
+        """
+        Forget the failures of urls so they are fetched again.
+
+        Args:
+            urls (iterable): The urls to recheck.
+        """
+        with self.lock:
+            for url in urls:
+                if self.entries.pop(url, None) is not None:
+                    self.dirty = True
+
+    def flush(self):
+        """
+        Write the cached failures to disk if they have changed.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.entries)
+            self.dirty = False
+        try:
+            with open(self.path, "w") as file:
+                file.write(data)
+        except OSError as e:
+            print(f"Failed to save failed url cache: {e}")
@@ -2,6 +2,7 @@ import os
 import tempfile
 import requests
 from tkinter import messagebox
+from http_client import HttpClient
 
 
 class Updater:
@@ -22,6 +23,7 @@ class Updater:
         self.repo = repo
         self.exe_name = exe_name
         self.root = root
+        self.http = HttpClient.shared()
 
     def get_latest_version(self):
         """
@@ -33,7 +35,7 @@ class Updater:
         """
         url = f"https://api.github.com/repos/{self.repo}/releases/latest"
         try:
-            response = requests.get(url)
+            response = self.http.get(url)
             response.raise_for_status()
             data = response.json()
             return data["tag_name"]  # Extract version from release tag
@@ -55,15 +57,14 @@ class Updater:
                         f"{version}/{versioned_new_name}")
 
         try:
-            response = requests.get(download_url, stream=True)
-            response.raise_for_status()
-
             # Download the new exe to a temporary file
             temp_dir = tempfile.gettempdir()
             temp_exe = os.path.join(temp_dir, f"{self.exe_name}_temp.exe")
-            with open(temp_exe, "wb") as file:
-                for chunk in response.iter_content(1024):
-                    file.write(chunk)
+            with self.http.stream(download_url) as response:
+                response.raise_for_status()
+                with open(temp_exe, "wb") as file:
+                    for chunk in response.iter_content(64 * 1024):
+                        file.write(chunk)
 
             # Create a temporary batch script to handle the update
             bat_script = os.path.join(temp_dir, "update.bat")